@@ -2,10 +2,65 @@
 Article query interface
 """
 
-from sqlalchemy import select
+import hashlib
+from html import escape
+from typing import Iterable, Optional, Sequence, Set
+from urllib.parse import quote
+
+from sqlalchemy import and_, delete, select, update
 
 from amanuensis.db import *
 from amanuensis.errors import ArgumentError, BackendArgumentTypeError
+from amanuensis.parser import (
+    StreamingVisitor,
+    normalize_title,
+    parse_raw_markdown,
+    scan_citations,
+)
+from amanuensis.parser.core import *
+
+
+class ArticleHtmlRenderer(StreamingVisitor):
+    """Renders an article token tree into published article HTML."""
+
+    def __init__(self, lexicon_name: str, extant_titles: Set[str]):
+        self.lexicon_name = lexicon_name
+        self.extant_titles = extant_titles
+
+    def TextSpan(self, span: TextSpan):
+        return escape(span.innertext, quote=False)
+
+    def LineBreak(self, span: LineBreak):
+        return "<br>"
+
+    def ParsedArticle(self, span: ParsedArticle):
+        return ("", "\n", "")
+
+    def BodyParagraph(self, span: BodyParagraph):
+        return ("<p>", "", "</p>")
+
+    def SignatureParagraph(self, span: SignatureParagraph):
+        return ('<hr><span class="signature"><p>', "", "</p></span>")
+
+    def BoldSpan(self, span: BoldSpan):
+        return ("<b>", "", "</b>")
+
+    def ItalicSpan(self, span: ItalicSpan):
+        return ("<i>", "", "</i>")
+
+    def CitationSpan(self, span: CitationSpan):
+        link = escape(self.link(span.cite_target))
+        link_class = (
+            "" if span.cite_target in self.extant_titles else ' class="phantom"'
+        )
+        return (f'<a href="{link}"{link_class}>', "", "</a>")
+
+    def link(self, title: str) -> str:
+        """Returns the URL of the page for a title."""
+        return (
+            f"/lexicon/{quote(self.lexicon_name, safe='')}"
+            f"/article/{quote(title, safe='')}"
+        )
 
 
 def create(
@@ -42,3 +97,218 @@ def create(
     db.session.add(new_article)
     db.session.commit()
     return new_article
+
+
+def publish(db: DbContext, article_id: int) -> Article:
+    """
+    Publish an article in the lexicon's current turn and record the titles
+    it cites in the citation table.
+    """
+    # Verify argument types are correct
+    if not isinstance(article_id, int):
+        raise BackendArgumentTypeError(int, article_id=article_id)
+
+    article: Article = db(
+        select(Article).where(Article.id == article_id)
+    ).scalar_one_or_none()
+    if not article:
+        raise ArgumentError("Article does not exist")
+    if article.turn is not None:
+        raise ArgumentError("Article is already published")
+    if article.state != ArticleState.APPROVED:
+        raise ArgumentError("Article has not been approved")
+    if article.lexicon.current_turn is None:
+        raise ArgumentError("Lexicon has not started")
+
+    # Titles are looked up by exact match after normalization, so they must
+    # be normalized and unique that way
+    article.title = normalize_title(article.title)
+    duplicate = db(
+        select(Article.id)
+        .where(Article.lexicon_id == article.lexicon_id)
+        .where(Article.turn.is_not(None))
+        .where(Article.title == article.title)
+    ).first()
+    if duplicate:
+        raise ArgumentError("An article with this title is already published")
+
+    article.turn = article.lexicon.current_turn
+    update_citations(db, article)
+    db.session.flush()
+
+    # This article's title is now extant, so the HTML of the articles that
+    # cite it is out of date
+    citers = select(ArticleCitation.article_id).where(
+        ArticleCitation.lexicon_id == article.lexicon_id,
+        ArticleCitation.target == article.title,
+    )
+    db(
+        update(Article)
+        .where(Article.id.in_(citers))
+        .where(Article.id != article.id)
+        .values(
+            rendered_html=None,
+            citation_fingerprint=None,
+            last_updated=Article.last_updated,
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+
+    render_html(db, article)
+    db.session.commit()
+    return article
+
+
+def update_citations(db: DbContext, article: Article) -> None:
+    """
+    Replace the citation table rows for an article with the citations in
+    its current body. The caller is responsible for committing.
+    """
+    db(delete(ArticleCitation).where(ArticleCitation.article_id == article.id))
+    db.session.add_all(
+        [
+            ArticleCitation(
+                article_id=article.id, target=target, lexicon_id=article.lexicon_id
+            )
+            for target in dict.fromkeys(scan_citations(article.body))
+        ]
+    )
+
+
+def get_citations(db: DbContext, article_id: int) -> Sequence[str]:
+    """Returns the titles cited by a published article."""
+    return db(
+        select(ArticleCitation.target)
+        .where(ArticleCitation.article_id == article_id)
+        .order_by(ArticleCitation.target)
+    ).scalars()
+
+
+def get_citers(db: DbContext, lexicon_id: int, title: str) -> Sequence[Article]:
+    """Returns the published articles in a lexicon that cite a title."""
+    return db(
+        select(Article)
+        .join(ArticleCitation, ArticleCitation.article_id == Article.id)
+        .where(ArticleCitation.lexicon_id == lexicon_id)
+        .where(ArticleCitation.target == normalize_title(title))
+        .order_by(Article.title)
+    ).scalars()
+
+
+def get_phantom_titles(db: DbContext, lexicon_id: int) -> Sequence[str]:
+    """Returns the titles in a lexicon that are cited but not yet written."""
+    written = (
+        select(Article.title)
+        .where(Article.lexicon_id == lexicon_id)
+        .where(Article.turn.is_not(None))
+    )
+    return db(
+        select(ArticleCitation.target)
+        .where(ArticleCitation.lexicon_id == lexicon_id)
+        .where(ArticleCitation.target.not_in(written))
+        .distinct()
+        .order_by(ArticleCitation.target)
+    ).scalars()
+
+
+def get_orphans(db: DbContext, lexicon_id: int) -> Sequence[Article]:
+    """Returns the published articles in a lexicon that no article cites."""
+    cited = select(ArticleCitation.target).where(
+        ArticleCitation.lexicon_id == lexicon_id
+    )
+    return db(
+        select(Article)
+        .where(Article.lexicon_id == lexicon_id)
+        .where(Article.turn.is_not(None))
+        .where(Article.title.not_in(cited))
+        .order_by(Article.title)
+    ).scalars()
+
+
+def get_published(db: DbContext, lexicon_id: int) -> Sequence[Article]:
+    """Returns the published articles in a lexicon."""
+    return db(
+        select(Article)
+        .where(Article.lexicon_id == lexicon_id)
+        .where(Article.turn.is_not(None))
+        .order_by(Article.title)
+    ).scalars()
+
+
+def try_from_title(db: DbContext, lexicon_id: int, title: str) -> Optional[Article]:
+    """Get a published article by its title."""
+    return db(
+        select(Article)
+        .where(Article.lexicon_id == lexicon_id)
+        .where(Article.title == normalize_title(title))
+        .where(Article.turn.is_not(None))
+    ).scalar_one_or_none()
+
+
+def get_extant_citations(db: DbContext, article_id: int) -> Set[str]:
+    """Returns the titles cited by an article that have been written."""
+    return set(
+        db(
+            select(ArticleCitation.target)
+            .join(
+                Article,
+                and_(
+                    Article.lexicon_id == ArticleCitation.lexicon_id,
+                    Article.title == ArticleCitation.target,
+                ),
+            )
+            .where(ArticleCitation.article_id == article_id)
+            .where(Article.turn.is_not(None))
+        ).scalars()
+    )
+
+
+def citation_fingerprint(extant_titles: Iterable[str]) -> str:
+    """Returns a hash identifying which cited titles are extant."""
+    joined = "\n".join(sorted(extant_titles))
+    return hashlib.blake2b(joined.encode("utf8"), digest_size=16).hexdigest()
+
+
+def render_html(
+    db: DbContext, article: Article, extant_titles: Optional[Set[str]] = None
+) -> str:
+    """
+    Render a published article to HTML and save the result, along with the
+    fingerprint of the citation state it was rendered against. The titles
+    the article cites that have been written are looked up if they are not
+    given. The caller is responsible for committing.
+    """
+    if extant_titles is None:
+        extant_titles = get_extant_citations(db, article.id)
+    html: str = parse_raw_markdown(article.body, single_pass=True).render(
+        ArticleHtmlRenderer(article.lexicon.name, extant_titles)
+    )
+    # Caching the render is not an edit, so keep the update timestamp
+    db(
+        update(Article)
+        .where(Article.id == article.id)
+        .values(
+            rendered_html=html,
+            citation_fingerprint=citation_fingerprint(extant_titles),
+            last_updated=Article.last_updated,
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+    return html
+
+
+def get_html(db: DbContext, article: Article) -> str:
+    """
+    Returns the rendered HTML of a published article. The saved HTML is
+    reused if the titles it cites are in the same state as when it was
+    rendered, and the article is rendered again otherwise.
+    """
+    extant_titles = get_extant_citations(db, article.id)
+    if (
+        article.rendered_html is not None
+        and article.citation_fingerprint == citation_fingerprint(extant_titles)
+    ):
+        return article.rendered_html
+    html = render_html(db, article, extant_titles)
+    db.session.commit()
+    return html
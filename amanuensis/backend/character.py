@@ -2,10 +2,10 @@
 Character query interface
 """
 
-from typing import Optional, Sequence
-from uuid import UUID
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
 
-from sqlalchemy import select, func
+from sqlalchemy import insert, select, func, tuple_
 
 from amanuensis.db import *
 from amanuensis.errors import ArgumentError, BackendArgumentTypeError
@@ -21,23 +21,7 @@ def create(
     """
     Create a new character for a user.
     """
-    # Verify argument types are correct
-    if not isinstance(lexicon_id, int):
-        raise BackendArgumentTypeError(int, lexicon_id=lexicon_id)
-    if not isinstance(user_id, int):
-        raise BackendArgumentTypeError(int, user_id=user_id)
-    if not isinstance(name, str):
-        raise BackendArgumentTypeError(str, name=name)
-    if signature is not None and not isinstance(signature, str):
-        raise BackendArgumentTypeError(str, signature=signature)
-
-    # Verify character name is valid
-    if not name.strip():
-        raise ArgumentError("Character name cannot be blank")
-
-    # If no signature is provided, use a default signature
-    if not signature or not signature.strip():
-        signature = f"~{name}"
+    signature = _verify_fields(lexicon_id, user_id, name, signature)
 
     # Check that the user is a member of this lexicon
     mem: Membership = db(
@@ -71,6 +55,102 @@ def create(
     return new_character
 
 
+def create_many(
+    db: DbContext, characters: Sequence[Mapping[str, Any]]
+) -> List[Character]:
+    """
+    Create several new characters at once. Each character is given as a
+    mapping of the arguments to `create`. Every character is verified before
+    any are created, and they are all inserted in one transaction.
+    """
+    rows = []
+    for character in characters:
+        signature = _verify_fields(
+            character["lexicon_id"],
+            character["user_id"],
+            character["name"],
+            character.get("signature"),
+        )
+        rows.append(
+            {
+                "public_id": uuid4(),
+                "lexicon_id": character["lexicon_id"],
+                "user_id": character["user_id"],
+                "name": character["name"],
+                "signature": signature,
+            }
+        )
+    keys = list({(row["user_id"], row["lexicon_id"]) for row in rows})
+
+    # Look up the memberships and character limits of every user at once
+    limits: Dict[Tuple[int, int], Optional[int]] = {
+        (user_id, lexicon_id): limit
+        for user_id, lexicon_id, limit in db(
+            select(Membership.user_id, Membership.lexicon_id, Lexicon.character_limit)
+            .join(Lexicon, Lexicon.id == Membership.lexicon_id)
+            .where(tuple_(Membership.user_id, Membership.lexicon_id).in_(keys))
+        )
+    }
+    counts: Dict[Tuple[int, int], int] = {
+        (user_id, lexicon_id): count
+        for user_id, lexicon_id, count in db(
+            select(Character.user_id, Character.lexicon_id, func.count(Character.id))
+            .where(tuple_(Character.user_id, Character.lexicon_id).in_(keys))
+            .group_by(Character.user_id, Character.lexicon_id)
+        )
+    }
+
+    # Check each user's character limit, counting the new characters
+    for row in rows:
+        key = (row["user_id"], row["lexicon_id"])
+        if key not in limits:
+            raise ArgumentError("User is not a member of lexicon")
+        count = counts.get(key, 0)
+        limit = limits[key]
+        if limit is not None and count >= limit:
+            raise ArgumentError("User is at character limit")
+        counts[key] = count + 1
+
+    if rows:
+        db(insert(Character), rows)
+    db.session.commit()
+    public_ids = [row["public_id"] for row in rows]
+    created = {
+        character.public_id: character
+        for character in db(
+            select(Character).where(Character.public_id.in_(public_ids))
+        ).scalars()
+    }
+    return [created[public_id] for public_id in public_ids]
+
+
+def _verify_fields(
+    lexicon_id: int, user_id: int, name: str, signature: Optional[str]
+) -> str:
+    """
+    Verify the fields of a new character and return the signature to use.
+    """
+    # Verify argument types are correct
+    if not isinstance(lexicon_id, int):
+        raise BackendArgumentTypeError(int, lexicon_id=lexicon_id)
+    if not isinstance(user_id, int):
+        raise BackendArgumentTypeError(int, user_id=user_id)
+    if not isinstance(name, str):
+        raise BackendArgumentTypeError(str, name=name)
+    if signature is not None and not isinstance(signature, str):
+        raise BackendArgumentTypeError(str, signature=signature)
+
+    # Verify character name is valid
+    if not name.strip():
+        raise ArgumentError("Character name cannot be blank")
+
+    # If no signature is provided, use a default signature
+    if not signature or not signature.strip():
+        signature = f"~{name}"
+
+    return signature
+
+
 def get_in_lexicon(db: DbContext, lexicon_id: int) -> Sequence[Character]:
     """Get all characters in a lexicon."""
     return db(select(Character).where(Character.lexicon_id == lexicon_id)).scalars()
@@ -2,13 +2,172 @@
 Index query interface
 """
 
+from bisect import bisect_right
 import re
-from typing import Optional, Sequence
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from weakref import WeakKeyDictionary
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update as update_stmt
 
-from amanuensis.db import DbContext, ArticleIndex, IndexType
+from amanuensis.db import DbContext, ArticleIndex, ArticleIndexRule, IndexType, Lexicon
 from amanuensis.errors import ArgumentError, BackendArgumentTypeError
+from amanuensis.parser import titlesort
+
+
+class IndexSchema:
+    """
+    A lexicon's indices compiled for assigning titles to indices. Indices
+    are tried in logical order, and a title belongs to the first index it
+    matches:
+    - CHAR indices match titles whose first sorting letter is in the pattern
+    - RANGE indices match titles whose first sorting letter is in the range
+    - PREFIX indices match titles that start with the pattern
+    - ETC indices match every title
+
+    Rather than trying each index in turn, the schema keeps a lookup table
+    for CHAR indices, a sorted list of range boundaries for RANGE indices,
+    and a trie for PREFIX indices, each storing the earliest index that
+    matches. Assigning a title takes time linear in the title's length.
+
+    The schema also holds the lexicon's index rules, which restrict the
+    indices a character may write in on a turn.
+    """
+
+    def __init__(
+        self,
+        indices: Iterable[ArticleIndex],
+        rules: Iterable[ArticleIndexRule] = (),
+    ):
+        # Indices in evaluation order. The position of an index in this list
+        # is its priority, with lower positions taking precedence.
+        self.indices: List[ArticleIndex] = sorted(
+            indices, key=lambda index: (index.logical_order, index.id or 0)
+        )
+        # Indices in display order
+        self.display: List[ArticleIndex] = sorted(
+            self.indices, key=lambda index: index.display_order
+        )
+
+        self._chars: Dict[str, int] = {}
+        self._trie: dict = {}
+        self._etc: Optional[int] = None
+        ranges = []
+        for pos, index in enumerate(self.indices):
+            if index.index_type == IndexType.CHAR:
+                for char in index.pattern.upper():
+                    self._chars.setdefault(char, pos)
+            elif index.index_type == IndexType.RANGE:
+                start, end = index.pattern[0].upper(), index.pattern[-1].upper()
+                ranges.append((start, end, pos))
+            elif index.index_type == IndexType.PREFIX:
+                node = self._trie
+                for char in index.pattern:
+                    node = node.setdefault(char, {})
+                # The empty string can't be a trie edge, so it marks the
+                # end of a pattern
+                node.setdefault("", pos)
+            elif index.index_type == IndexType.ETC:
+                if self._etc is None:
+                    self._etc = pos
+
+        # Split the ranges into disjoint segments, each mapped to the
+        # earliest range covering it
+        bounds = sorted(
+            {start for start, _, _ in ranges}
+            | {chr(ord(end) + 1) for _, end, _ in ranges}
+        )
+        self._range_bounds: List[str] = bounds
+        self._range_best: List[Optional[int]] = [
+            min(
+                (pos for start, end, pos in ranges if start <= bound <= end),
+                default=None,
+            )
+            for bound in bounds
+        ]
+
+        # Index rules, by turn and then by character
+        by_id = {index.id: index for index in self.indices}
+        self.rules: Dict[int, Dict[int, List[ArticleIndex]]] = {}
+        for rule in rules:
+            self.rules.setdefault(rule.turn, {}).setdefault(
+                rule.character_id, []
+            ).append(by_id[rule.index_id])
+
+    def index_for(self, title: str) -> Optional[ArticleIndex]:
+        """Returns the index a title belongs in, or None if none match."""
+        best = self._etc
+        first = titlesort(title)[:1].upper()
+        if first:
+            pos = self._chars.get(first)
+            if pos is not None and (best is None or pos < best):
+                best = pos
+            segment = bisect_right(self._range_bounds, first) - 1
+            if segment >= 0:
+                pos = self._range_best[segment]
+                if pos is not None and (best is None or pos < best):
+                    best = pos
+        node = self._trie
+        for char in title:
+            child: Optional[dict] = node.get(char)
+            if child is None:
+                break
+            node = child
+            pos = node.get("")
+            if pos is not None and (best is None or pos < best):
+                best = pos
+        return self.indices[best] if best is not None else None
+
+    def allowed_indices(
+        self, character_id: int, turn: int
+    ) -> Optional[List[ArticleIndex]]:
+        """
+        Returns the indices a character may write in on a turn, or None if
+        the character is not restricted on that turn.
+        """
+        return self.rules.get(turn, {}).get(character_id)
+
+    def permits(self, character_id: int, turn: int, title: str) -> bool:
+        """Returns whether a character may write a title on a turn."""
+        allowed = self.allowed_indices(character_id, turn)
+        return allowed is None or self.index_for(title) in allowed
+
+    def bucket(
+        self, items: Iterable[Any], key: Callable[[Any], str] = lambda item: item
+    ) -> Dict[ArticleIndex, List[Any]]:
+        """
+        Sorts items into the indices they belong in, in one pass. `key` maps
+        an item to its title. The buckets are returned in display order and
+        the items in each bucket are sorted by title. Empty ETC indices are
+        left out.
+        """
+        buckets: Dict[ArticleIndex, List[Any]] = {index: [] for index in self.display}
+        for item in sorted(items, key=lambda item: titlesort(key(item))):
+            index = self.index_for(key(item))
+            if index is not None:
+                buckets[index].append(item)
+        for index in self.display:
+            if index.index_type == IndexType.ETC and not buckets[index]:
+                del buckets[index]
+        return buckets
+
+
+# Compiled index schemas, by database and lexicon id, along with the index
+# version they were compiled at
+_schemas: "WeakKeyDictionary[DbContext, Dict[int, Tuple[int, IndexSchema]]]" = (
+    WeakKeyDictionary()
+)
+_schemas_lock = Lock()
 
 
 def create(
@@ -23,6 +182,73 @@ def create(
     """
     Create a new index in a lexicon.
     """
+    _verify_fields(
+        lexicon_id, index_type, pattern, logical_order, display_order, capacity
+    )
+
+    new_index = ArticleIndex(
+        lexicon_id=lexicon_id,
+        index_type=index_type,
+        pattern=pattern,
+        logical_order=logical_order,
+        display_order=display_order,
+        capacity=capacity,
+    )
+    db.session.add(new_index)
+    invalidate_schema(db, lexicon_id)
+    db.session.commit()
+    return new_index
+
+
+def create_many(
+    db: DbContext, indices: Sequence[Mapping[str, Any]]
+) -> List[ArticleIndex]:
+    """
+    Create several new indices at once. Each index is given as a mapping of
+    the arguments to `create`. Every index is verified before any are
+    created, and they are all inserted in one transaction.
+    """
+    rows = []
+    for index in indices:
+        row = {
+            "lexicon_id": index["lexicon_id"],
+            "index_type": index["index_type"],
+            "pattern": index["pattern"],
+            "logical_order": index.get("logical_order", 0),
+            "display_order": index.get("display_order", 0),
+            "capacity": index.get("capacity"),
+        }
+        _verify_fields(**row)
+        rows.append(row)
+
+    lexicon_ids = {row["lexicon_id"] for row in rows}
+    if rows:
+        db(insert(ArticleIndex), rows)
+    for lexicon_id in lexicon_ids:
+        invalidate_schema(db, lexicon_id)
+    db.session.commit()
+    created = {
+        (index.lexicon_id, index.index_type, index.pattern): index
+        for index in db(
+            select(ArticleIndex).where(ArticleIndex.lexicon_id.in_(lexicon_ids))
+        ).scalars()
+    }
+    return [
+        created[(row["lexicon_id"], row["index_type"], row["pattern"])] for row in rows
+    ]
+
+
+def _verify_fields(
+    lexicon_id: int,
+    index_type: IndexType,
+    pattern: str,
+    logical_order: int,
+    display_order: int,
+    capacity: Optional[int],
+) -> None:
+    """
+    Verify the fields of a new index.
+    """
     # Verify argument types are correct
     if not isinstance(lexicon_id, int):
         raise BackendArgumentTypeError(int, lexicon_id=lexicon_id)
@@ -63,18 +289,6 @@ def create(
                 f"Pattern '{pattern}' too short for index type {index_type}"
             )
 
-    new_index = ArticleIndex(
-        lexicon_id=lexicon_id,
-        index_type=index_type,
-        pattern=pattern,
-        logical_order=logical_order,
-        display_order=display_order,
-        capacity=capacity,
-    )
-    db.session.add(new_index)
-    db.session.commit()
-    return new_index
-
 
 def get_for_lexicon(db: DbContext, lexicon_id: int) -> Sequence[ArticleIndex]:
     """Returns all index rules for a lexicon."""
@@ -83,6 +297,60 @@ def get_for_lexicon(db: DbContext, lexicon_id: int) -> Sequence[ArticleIndex]:
     ).scalars()
 
 
+def get_schema(db: DbContext, lexicon_id: int) -> IndexSchema:
+    """
+    Returns the compiled index schema for a lexicon. Schemas are cached for
+    the life of the process and recompiled when the lexicon's index version
+    changes. The cached indices are copies that are not attached to any
+    session, so they can be shared between requests.
+    """
+    version: Optional[int] = db(
+        select(Lexicon.index_version).where(Lexicon.id == lexicon_id)
+    ).scalar_one_or_none()
+    if version is None:
+        raise ArgumentError("Lexicon does not exist")
+    with _schemas_lock:
+        cached = _schemas.setdefault(db, {}).get(lexicon_id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    indices = [
+        ArticleIndex(
+            id=index.id,
+            lexicon_id=index.lexicon_id,
+            index_type=index.index_type,
+            pattern=index.pattern,
+            logical_order=index.logical_order,
+            display_order=index.display_order,
+            capacity=index.capacity,
+        )
+        for index in get_for_lexicon(db, lexicon_id)
+    ]
+    rules = db(
+        select(ArticleIndexRule).where(ArticleIndexRule.lexicon_id == lexicon_id)
+    ).scalars()
+    schema = IndexSchema(indices, rules)
+    with _schemas_lock:
+        _schemas[db][lexicon_id] = (version, schema)
+    return schema
+
+
+def invalidate_schema(db: DbContext, lexicon_id: int) -> None:
+    """
+    Bumps a lexicon's index version so that cached schemas are recompiled.
+    The caller is responsible for committing.
+    """
+    db(
+        update_stmt(Lexicon)
+        .where(Lexicon.id == lexicon_id)
+        .values(
+            index_version=Lexicon.index_version + 1,
+            last_updated=Lexicon.last_updated,
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+
+
 def update(db: DbContext, lexicon_id: int, indices: Sequence[ArticleIndex]) -> None:
     """
     Update the indices for a lexicon. Indices are matched by type and pattern.
@@ -94,25 +362,49 @@ def update(db: DbContext, lexicon_id: int, indices: Sequence[ArticleIndex]) -> N
     or pattern updated: such an operation will always result in the deletion of
     the old index and the creation of a new index.
     """
-    extant_indices: Sequence[ArticleIndex] = list(get_for_lexicon(db, lexicon_id))
-    for extant_index in extant_indices:
-        match = None
-        for new_index in indices:
-            if extant_index.name == new_index.name:
-                match = new_index
-                break
-        if match:
-            extant_index.logical_order = new_index.logical_order
-            extant_index.display_order = new_index.display_order
-            extant_index.capacity = new_index.capacity
-        else:
-            db.session.delete(extant_index)
-    for new_index in indices:
-        match = None
-        for extant_index in extant_indices:
-            if extant_index.name == new_index.name:
-                match = extant_index
-                break
-        if not match:
-            db.session.add(new_index)
+    extant: Dict[Tuple[IndexType, str], ArticleIndex] = {
+        (index.index_type, index.pattern): index
+        for index in get_for_lexicon(db, lexicon_id)
+    }
+    desired: Dict[Tuple[IndexType, str], ArticleIndex] = {
+        (index.index_type, index.pattern): index for index in indices
+    }
+
+    # Apply the difference as one statement for each kind of change
+    removed = [extant[key].id for key in extant.keys() - desired.keys()]
+    if removed:
+        db(
+            delete(ArticleIndex)
+            .where(ArticleIndex.id.in_(removed))
+            .execution_options(synchronize_session="fetch")
+        )
+    added = [
+        {
+            "lexicon_id": lexicon_id,
+            "index_type": index.index_type,
+            "pattern": index.pattern,
+            "logical_order": index.logical_order,
+            "display_order": index.display_order,
+            "capacity": index.capacity,
+        }
+        for key, index in desired.items()
+        if key not in extant
+    ]
+    if added:
+        db(insert(ArticleIndex), added)
+    changed = [
+        {
+            "id": extant[key].id,
+            "logical_order": index.logical_order,
+            "display_order": index.display_order,
+            "capacity": index.capacity,
+        }
+        for key, index in desired.items()
+        if key in extant
+        and (index.logical_order, index.display_order, index.capacity)
+        != (extant[key].logical_order, extant[key].display_order, extant[key].capacity)
+    ]
+    if changed:
+        db.session.bulk_update_mappings(ArticleIndex, changed)
+    invalidate_schema(db, lexicon_id)
     db.session.commit()
@@ -2,10 +2,11 @@
 Index rule query interface
 """
 
-from typing import Sequence
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select
 
+from amanuensis.backend.index import invalidate_schema
 from amanuensis.db import *
 from amanuensis.errors import ArgumentError, BackendArgumentTypeError
 
@@ -18,15 +19,7 @@ def create(
     turn: int,
 ) -> ArticleIndexRule:
     """Create an index assignment."""
-    # Verify argument types are correct
-    if not isinstance(lexicon_id, int):
-        raise BackendArgumentTypeError(int, lexicon_id=lexicon_id)
-    if character_id is not None and not isinstance(character_id, int):
-        raise BackendArgumentTypeError(int, character_id=character_id)
-    if not isinstance(index_id, int):
-        raise BackendArgumentTypeError(int, index_id=index_id)
-    if not isinstance(turn, int):
-        raise BackendArgumentTypeError(int, turn=turn)
+    _verify_fields(lexicon_id, character_id, index_id, turn)
 
     # Verify the character belongs to the lexicon
     character: Character = db(
@@ -53,10 +46,88 @@ def create(
         turn=turn,
     )
     db.session.add(new_assignment)
+    invalidate_schema(db, lexicon_id)
     db.session.commit()
     return new_assignment
 
 
+def create_many(
+    db: DbContext, rules: Sequence[Mapping[str, Any]]
+) -> List[ArticleIndexRule]:
+    """
+    Create several index assignments at once. Each assignment is given as a
+    mapping of the arguments to `create`. Every assignment is verified before
+    any are created, and they are all inserted in one transaction.
+    """
+    rows = []
+    for rule in rules:
+        row = {
+            "lexicon_id": rule["lexicon_id"],
+            "character_id": rule["character_id"],
+            "index_id": rule["index_id"],
+            "turn": rule["turn"],
+        }
+        _verify_fields(**row)
+        rows.append(row)
+
+    # Look up the lexicons of every character and index at once
+    character_lexicons: Dict[int, int] = dict(
+        db(
+            select(Character.id, Character.lexicon_id).where(
+                Character.id.in_({row["character_id"] for row in rows})
+            )
+        ).all()
+    )
+    index_lexicons: Dict[int, int] = dict(
+        db(
+            select(ArticleIndex.id, ArticleIndex.lexicon_id).where(
+                ArticleIndex.id.in_({row["index_id"] for row in rows})
+            )
+        ).all()
+    )
+    for row in rows:
+        if row["character_id"] not in character_lexicons:
+            raise ArgumentError("Character does not exist")
+        if character_lexicons[row["character_id"]] != row["lexicon_id"]:
+            raise ArgumentError("Character belongs to the wrong lexicon")
+        if row["index_id"] not in index_lexicons:
+            raise ArgumentError("Index does not exist")
+        if index_lexicons[row["index_id"]] != row["lexicon_id"]:
+            raise ArgumentError("Index belongs to the wrong lexicon")
+
+    lexicon_ids = {row["lexicon_id"] for row in rows}
+    if rows:
+        db(insert(ArticleIndexRule), rows)
+    for lexicon_id in lexicon_ids:
+        invalidate_schema(db, lexicon_id)
+    db.session.commit()
+    created = {
+        (rule.character_id, rule.index_id, rule.turn): rule
+        for rule in db(
+            select(ArticleIndexRule).where(ArticleIndexRule.lexicon_id.in_(lexicon_ids))
+        ).scalars()
+    }
+    return [
+        created[(row["character_id"], row["index_id"], row["turn"])] for row in rows
+    ]
+
+
+def _verify_fields(
+    lexicon_id: int, character_id: int, index_id: int, turn: int
+) -> None:
+    """
+    Verify the argument types of a new index assignment.
+    """
+    if not isinstance(lexicon_id, int):
+        raise BackendArgumentTypeError(int, lexicon_id=lexicon_id)
+    if character_id is not None and not isinstance(character_id, int):
+        raise BackendArgumentTypeError(int, character_id=character_id)
+    if not isinstance(index_id, int):
+        raise BackendArgumentTypeError(int, index_id=index_id)
+    if not isinstance(turn, int):
+        raise BackendArgumentTypeError(int, turn=turn)
+
+
 def get_for_lexicon(db: DbContext, lexicon_id: int) -> Sequence[ArticleIndex]:
     """Returns all index rules for a lexicon."""
     return db(
@@ -75,26 +146,40 @@ def update(db: DbContext, lexicon_id: int, rules: Sequence[ArticleIndexRule]) ->
     no other attributes that can be updated, so they are simply created or
     deleted based on their presence or absence in the desired rule list.
     """
-    print(rules)
-    extant_rules: Sequence[ArticleIndexRule] = list(get_for_lexicon(db, lexicon_id))
-    for extant_rule in extant_rules:
-        if not any(
-            [
-                extant_rule.character_id == new_rule.character_id
-                and extant_rule.index_id == new_rule.index_id
-                and extant_rule.turn == new_rule.turn
-                for new_rule in rules
-            ]
-        ):
-            db.session.delete(extant_rule)
-    for new_rule in rules:
-        if not any(
-            [
-                extant_rule.character_id == new_rule.character_id
-                and extant_rule.index_id == new_rule.index_id
-                and extant_rule.turn == new_rule.turn
-                for extant_rule in extant_rules
-            ]
-        ):
-            db.session.add(new_rule)
+    extant: Dict[Tuple[int, int, int], int] = {
+        (character_id, index_id, turn): rule_id
+        for rule_id, character_id, index_id, turn in db(
+            select(
+                ArticleIndexRule.id,
+                ArticleIndexRule.character_id,
+                ArticleIndexRule.index_id,
+                ArticleIndexRule.turn,
+            ).where(ArticleIndexRule.lexicon_id == lexicon_id)
+        )
+    }
+    desired = dict.fromkeys(
+        (rule.character_id, rule.index_id, rule.turn) for rule in rules
+    )
+
+    # Apply the difference as one statement for each kind of change
+    removed = [extant[key] for key in extant.keys() - desired.keys()]
+    if removed:
+        db(
+            delete(ArticleIndexRule)
+            .where(ArticleIndexRule.id.in_(removed))
+            .execution_options(synchronize_session="fetch")
+        )
+    added = [
+        {
+            "lexicon_id": lexicon_id,
+            "character_id": character_id,
+            "index_id": index_id,
+            "turn": turn,
+        }
+        for character_id, index_id, turn in desired
+        if (character_id, index_id, turn) not in extant
+    ]
+    if added:
+        db(insert(ArticleIndexRule), added)
+    invalidate_schema(db, lexicon_id)
     db.session.commit()
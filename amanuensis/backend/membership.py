@@ -7,7 +7,7 @@ from typing import Sequence
 from sqlalchemy import select, func
 
 from amanuensis.db import DbContext, Membership
-from amanuensis.db.models import Lexicon
+from amanuensis.db.models import Lexicon, Post
 from amanuensis.errors import ArgumentError, BackendArgumentTypeError
 
 
@@ -58,10 +58,16 @@ def create(
         ):
             raise ArgumentError("Can't join: Lexicon is full")
 
+    # A new member hasn't seen any posts, so every post in the lexicon
+    # starts out unread. Counting in the insert keeps a post made at the
+    # same time from being missed.
     new_membership = Membership(
         user_id=user_id,
         lexicon_id=lexicon_id,
         is_editor=is_editor,
+        unread_post_count=select(func.count(Post.id))
+        .where(Post.lexicon_id == lexicon_id)
+        .scalar_subquery(),
     )
     db.session.add(new_membership)
     db.session.commit()
@@ -2,15 +2,20 @@
 Post query interface
 """
 
-from typing import Optional, Sequence, Tuple
+from collections import Counter
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 
-from sqlalchemy import select, update, func, or_, DateTime
+from sqlalchemy import insert, select, update, func, or_, tuple_, DateTime
 
 from amanuensis.db import DbContext, Post
 from amanuensis.db.models import Lexicon, Membership
 from amanuensis.errors import ArgumentError, BackendArgumentTypeError
 
 
+# The number of posts in a page of a lexicon's feed
+PAGE_SIZE = 20
+
+
 def create(
     db: DbContext,
     lexicon_id: int,
@@ -20,7 +25,76 @@ def create(
     """
     Create a new post
     """
+    _verify_fields(lexicon_id, user_id, body)
+
+    # Check that the lexicon allows posting
+    if not (
+        db(select(Lexicon).where(Lexicon.id == lexicon_id))
+        .scalar_one_or_none()
+        .allow_post
+    ):
+        raise ArgumentError("Lexicon does not allow posting.")
+
+    new_post = Post(lexicon_id=lexicon_id, user_id=user_id, body=body)
+    db.session.add(new_post)
+
+    # Count the post as unread for every member of the lexicon
+    db(
+        update(Membership)
+        .where(Membership.lexicon_id == lexicon_id)
+        .values(unread_post_count=Membership.unread_post_count + 1)
+        .execution_options(synchronize_session="fetch")
+    )
+    db.session.commit()
+    return new_post
+
+
+def create_many(db: DbContext, posts: Sequence[Mapping[str, Any]]) -> int:
+    """
+    Create several new posts at once. Each post is given as a mapping of the
+    arguments to `create`. Every post is verified before any are created,
+    and they are all inserted in one transaction. Returns the number of
+    posts created.
+    """
+    rows = []
+    for post in posts:
+        row = {
+            "lexicon_id": post["lexicon_id"],
+            "user_id": post.get("user_id"),
+            "body": post["body"],
+        }
+        _verify_fields(**row)
+        rows.append(row)
+
+    # Check that every lexicon allows posting
+    per_lexicon = Counter(row["lexicon_id"] for row in rows)
+    allow_post: Dict[int, bool] = dict(
+        db(
+            select(Lexicon.id, Lexicon.allow_post).where(Lexicon.id.in_(per_lexicon))
+        ).all()
+    )
+    if not all(allow_post.get(lexicon_id) for lexicon_id in per_lexicon):
+        raise ArgumentError("Lexicon does not allow posting.")
+
+    if rows:
+        db(insert(Post), rows)
+
+    # Count the posts as unread for every member of their lexicons
+    for lexicon_id, count in per_lexicon.items():
+        db(
+            update(Membership)
+            .where(Membership.lexicon_id == lexicon_id)
+            .values(unread_post_count=Membership.unread_post_count + count)
+            .execution_options(synchronize_session="fetch")
+        )
+    db.session.commit()
+    return len(rows)
 
+
+def _verify_fields(lexicon_id: int, user_id: Optional[int], body: str) -> None:
+    """
+    Verify the fields of a new post.
+    """
     # Verify lexicon id
     if not isinstance(lexicon_id, int):
         raise BackendArgumentTypeError(int, lexicon_id=lexicon_id)
@@ -35,69 +109,123 @@ def create(
     if not body.strip():
         raise ArgumentError("Post body cannot be empty.")
 
-    # Check that the lexicon allows posting
-    if not (
-        db(select(Lexicon).where(Lexicon.id == lexicon_id))
-        .scalar_one_or_none()
-        .allow_post
-    ):
-        raise ArgumentError("Lexicon does not allow posting.")
 
-    new_post = Post(lexicon_id=lexicon_id, user_id=user_id, body=body)
-    db.session.add(new_post)
-    db.session.commit()
-    return new_post
+def get_feed(
+    db: DbContext,
+    lexicon_id: int,
+    before: Optional[int] = None,
+    page_size: int = PAGE_SIZE,
+) -> Tuple[List[Post], Optional[int]]:
+    """
+    Returns a page of a lexicon's posts, newest first, along with a cursor
+    for the next page of older posts, or None if this is the last page.
+    `before` is a cursor from a previous page, which is the id of the last
+    post on that page. Pages are read by seeking the post index on creation
+    time and id rather than by offset, so every page costs the same to read.
+    """
+    query = select(Post).where(Post.lexicon_id == lexicon_id)
+    if before is not None:
+        # Compare against the stored creation time of the cursor post, rather
+        # than a value round-tripped through Python, so the comparison sees
+        # the same representation as the index
+        before_created = select(Post.created).where(Post.id == before)
+        query = query.where(
+            tuple_(Post.created, Post.id)
+            < tuple_(before_created.scalar_subquery(), before)
+        )
+    posts: List[Post] = list(
+        db(
+            query.order_by(Post.created.desc(), Post.id.desc()).limit(page_size + 1)
+        ).scalars()
+    )
+    if len(posts) <= page_size:
+        return posts, None
+    posts = posts[:page_size]
+    return posts, posts[-1].id
 
 
 def get_posts_for_membership(
-    db: DbContext, membership_id: int
-) -> Tuple[Sequence[Post], Sequence[Post]]:
+    db: DbContext,
+    membership_id: int,
+    before: Optional[int] = None,
+    page_size: int = PAGE_SIZE,
+) -> Tuple[Sequence[Post], Sequence[Post], Optional[int]]:
     """
-    Returns posts for the membership's lexicon, split into posts that
-    are new since the last view and posts that were previously seen.
+    Returns a page of posts for the membership's lexicon, split into posts
+    that are new since the last view and posts that were previously seen,
+    and a cursor for the next page. Viewing the first page marks all posts
+    as seen.
     """
-    # Save the current timestamp, so we don't miss posts created between now
-    # and when we finish looking stuff up
-    now: DateTime = db(select(func.now())).scalar_one()
-
-    # Save the previous last-seen timestamp for splitting new from old posts,
-    # then update the membership with the current time
-    last_seen: DateTime = db(
-        select(Membership.last_post_seen).where(Membership.id == membership_id)
+    membership: Membership = db(
+        select(Membership).where(Membership.id == membership_id)
     ).scalar_one()
-    db(
-        update(Membership)
-        .where(Membership.id == membership_id)
-        .values(last_post_seen=now)
-    )
-    db.session.commit()
-
-    # Fetch posts in two groups, new ones after the last-seen time and old ones
-    # If last-seen is null, then just return everything as new
-    new_posts = db(
-        select(Post)
-        .where(last_seen is None or Post.created > last_seen)
-        .order_by(Post.created.desc())
-    ).scalars()
-    old_posts = db(
-        select(Post)
-        .where(last_seen is not None and Post.created <= last_seen)
-        .order_by(Post.created.desc())
-    ).scalars()
+    last_seen: Optional[DateTime] = membership.last_post_seen
+
+    if before is None:
+        # Save the current timestamp before looking up posts, so we don't
+        # miss posts created between now and when the page is read
+        now: DateTime = db(select(func.now())).scalar_one()
+        db(
+            update(Membership)
+            .where(Membership.id == membership_id)
+            .values(last_post_seen=now, unread_post_count=0)
+        )
+        db.session.commit()
 
-    return new_posts, old_posts
+    posts, next_cursor = get_feed(db, membership.lexicon_id, before, page_size)
+    new_posts = [p for p in posts if last_seen is None or p.created > last_seen]
+    old_posts = [p for p in posts if last_seen is not None and p.created <= last_seen]
+    return new_posts, old_posts, next_cursor
 
 
 def get_unread_count(db: DbContext, membership_id: int) -> int:
     """Get the number of posts that the member has not seen"""
     return db(
+        select(Membership.unread_post_count).where(Membership.id == membership_id)
+    ).scalar()
+
+
+def count_unread(db: DbContext, membership_id: int) -> int:
+    """
+    Count the posts that the member has not seen from the post table,
+    rather than reading the membership's unread counter.
+    """
+    return db(select(unread_posts()).where(Membership.id == membership_id)).scalar()
+
+
+def reconcile_unread_counts(db: DbContext, lexicon_id: Optional[int] = None) -> int:
+    """
+    Correct the unread counters of all memberships, or of the memberships in
+    a lexicon, that differ from the number of unread posts. Returns the
+    number of memberships corrected.
+    """
+    actual = unread_posts()
+    query = (
+        update(Membership)
+        .where(Membership.unread_post_count != actual)
+        .values(unread_post_count=actual)
+    )
+    if lexicon_id is not None:
+        query = query.where(Membership.lexicon_id == lexicon_id)
+    result = db(query.execution_options(synchronize_session="fetch"))
+    db.session.commit()
+    return result.rowcount
+
+
+def unread_posts():
+    """
+    Returns a subquery counting the posts that a membership has not seen,
+    correlated to the membership in the enclosing statement.
+    """
+    return (
         select(func.count(Post.id))
-        .join(Membership, Membership.lexicon_id == Post.lexicon_id)
+        .where(Post.lexicon_id == Membership.lexicon_id)
         .where(
             or_(
                 Membership.last_post_seen.is_(None),
                 Post.created > Membership.last_post_seen,
             )
         )
-        .where(Membership.id == membership_id)
-    ).scalar()
+        .correlate(Membership)
+        .scalar_subquery()
+    )
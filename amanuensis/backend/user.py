@@ -4,9 +4,9 @@ User query interface
 
 import datetime
 import re
-from typing import Optional, Sequence
+from typing import Any, List, Mapping, Optional, Sequence
 
-from sqlalchemy import select, func, update
+from sqlalchemy import insert, select, func, update
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from amanuensis.db import DbContext, User
@@ -28,6 +28,69 @@ def create(
     """
     Create a new user.
     """
+    display_name = _verify_fields(username, password, display_name, email)
+
+    # Query the db to make sure the username isn't taken
+    if db(select(func.count(User.id)).where(User.username == username)).scalar() > 0:
+        raise ArgumentError("Username is already taken")
+
+    new_user = User(
+        username=username,
+        password=generate_password_hash(password),
+        display_name=display_name,
+        email=email,
+        is_site_admin=is_site_admin,
+    )
+    db.session.add(new_user)
+    db.session.commit()
+    return new_user
+
+
+def create_many(db: DbContext, users: Sequence[Mapping[str, Any]]) -> List[User]:
+    """
+    Create several new users at once. Each user is given as a mapping of the
+    arguments to `create`. Every user is verified before any are created,
+    and they are all inserted in one transaction.
+    """
+    rows = []
+    for user in users:
+        username = user["username"]
+        display_name = _verify_fields(
+            username, user["password"], user.get("display_name"), user["email"]
+        )
+        rows.append(
+            {
+                "username": username,
+                "password": generate_password_hash(user["password"]),
+                "display_name": display_name,
+                "email": user["email"],
+                "is_site_admin": user.get("is_site_admin", False),
+            }
+        )
+
+    # Query the db once to make sure none of the usernames are taken
+    usernames = [row["username"] for row in rows]
+    if len(set(usernames)) < len(usernames):
+        raise ArgumentError("Username is repeated")
+    if db(select(func.count(User.id)).where(User.username.in_(usernames))).scalar():
+        raise ArgumentError("Username is already taken")
+
+    if rows:
+        db(insert(User), rows)
+    db.session.commit()
+    created = {
+        user.username: user
+        for user in db(select(User).where(User.username.in_(usernames))).scalars()
+    }
+    return [created[username] for username in usernames]
+
+
+def _verify_fields(
+    username: str, password: str, display_name: Optional[str], email: str
+) -> str:
+    """
+    Verify the fields of a new user and return the display name to use.
+    """
     # Verify username
     if not isinstance(username, str):
         raise BackendArgumentTypeError(str, username=username)
@@ -55,20 +118,7 @@ def create(
     if not isinstance(email, str):
         raise BackendArgumentTypeError(str, email=email)
 
-    # Query the db to make sure the username isn't taken
-    if db(select(func.count(User.id)).where(User.username == username)).scalar() > 0:
-        raise ArgumentError("Username is already taken")
-
-    new_user = User(
-        username=username,
-        password=generate_password_hash(password),
-        display_name=display_name,
-        email=email,
-        is_site_admin=is_site_admin,
-    )
-    db.session.add(new_user)
-    db.session.commit()
-    return new_user
+    return display_name
 
 
 def get_all(db: DbContext) -> Sequence[User]:
@@ -11,6 +11,7 @@ import amanuensis.cli.lexicon
 import amanuensis.cli.post
 import amanuensis.cli.user
 from amanuensis.db import DbContext
+from amanuensis.db.database import SQLITE_PROFILES
 
 
 LOGGING_CONFIG = {
@@ -89,7 +90,7 @@ def get_db_factory(args: Namespace) -> Callable[[], DbContext]:
         """Lazy loader for the database connection."""
         if not os.path.exists(args.db_path):
             args.parser.error(f"No database found at {args.db_path}")
-        return DbContext(path=args.db_path, echo=args.verbose)
+        return DbContext(path=args.db_path, echo=args.verbose, profile=args.db_profile)
 
     return get_db
 
@@ -107,6 +108,12 @@ def main():
     parser.add_argument(
         "--db", dest="db_path", default="db.sqlite", help="Path to Amanuensis database"
     )
+    parser.add_argument(
+        "--db-profile",
+        default="default",
+        choices=list(SQLITE_PROFILES),
+        help="SQLite connection profile",
+    )
 
     # Add commands from cli submodules
     subparsers = parser.add_subparsers(metavar="COMMAND")
@@ -4,6 +4,7 @@ import logging
 import os
 
 from amanuensis.db import DbContext
+from amanuensis.db.migrations import get_pending, migrate, stamp
 
 from .helpers import add_argument
 
@@ -24,8 +25,30 @@ def command_init_db(args) -> int:
 
     # Initialize the database
     LOG.info(f"Creating database at {args.db_path}")
-    args.get_db().create_all()
+    db: DbContext = args.get_db()
+    db.create_all()
 
+    # The new schema is already up to date
+    stamp(db)
+
+    LOG.info("Done")
+    return 0
+
+
+@add_argument("--target", type=int, help="Migrate up to this version")
+@add_argument("--list", action="store_true", help="List pending migrations")
+def command_migrate(args) -> int:
+    """
+    Apply pending schema migrations to the database.
+    """
+    db: DbContext = args.get_db()
+    if args.list:
+        for migration in get_pending(db):
+            LOG.info(f"{migration.version}: {migration.description}")
+        return 0
+
+    if not migrate(db, args.target):
+        LOG.info("Database is up to date")
     LOG.info("Done")
     return 0
 
@@ -4,6 +4,7 @@ from sqlalchemy import update
 
 from amanuensis.backend import lexiq, memq, userq
 from amanuensis.db import DbContext, Lexicon
+from amanuensis.export import export_lexicon
 
 from .helpers import add_argument
 
@@ -74,3 +75,24 @@ def command_edit(args):
     LOG.info(f"Updated {result.rowcount} lexicons")
     db.session.commit()
     return 0 if result.rowcount == 1 else -1
+
+
+@add_argument("name")
+@add_argument("output", help="Directory to write the site to")
+@add_argument(
+    "--workers",
+    type=int,
+    default=None,
+    help="Processes to render articles with (default: one per CPU)",
+)
+def command_export(args):
+    """
+    Export a lexicon's published pages as a static site.
+    """
+    db: DbContext = args.get_db()
+    lexicon = lexiq.try_from_name(db, args.name)
+    if not lexicon:
+        raise ValueError("Lexicon does not exist")
+    pages = export_lexicon(db, lexicon, args.output, max_workers=args.workers)
+    LOG.info(f"Exported {pages} pages from lexicon {args.name} to {args.output}")
+    return 0
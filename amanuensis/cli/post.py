@@ -29,3 +29,20 @@ def command_create(args) -> int:
     preview = post.body[:20] + "..." if len(post.body) > 20 else post.body
     LOG.info(f"Posted '{preview}' in {lexicon.full_title}")
     return 0
+
+
+@add_argument("--lexicon", help="The lexicon's name (default: all lexicons)")
+def command_reconcile_unread(args) -> int:
+    """
+    Correct membership unread post counters against the post table.
+    """
+    db: DbContext = args.get_db()
+    lexicon_id = None
+    if args.lexicon:
+        lexicon = lexiq.try_from_name(db, args.lexicon)
+        if not lexicon:
+            raise ValueError("Lexicon does not exist")
+        lexicon_id = lexicon.id
+    corrected = postq.reconcile_unread_counts(db, lexicon_id)
+    LOG.info(f"Corrected {corrected} unread counters")
+    return 0
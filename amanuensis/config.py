@@ -3,6 +3,11 @@ from typing import Optional
 import os
 
 
+def optional_int(value: str) -> Optional[int]:
+    """Parses an integer config value, where "none" means no value."""
+    return None if value.lower() == "none" else int(value)
+
+
 class AmanuensisConfig:
     """Base config type. Defines config keys for subclasses to override."""
 
@@ -12,6 +17,16 @@ class AmanuensisConfig:
     STATIC_ROOT: Optional[str] = "../resources"
     SECRET_KEY: Optional[str] = "secret"
     DATABASE_URI: Optional[str] = "sqlite:///:memory:"
+    # Connection settings for the database. See DbContext.
+    DATABASE_PROFILE: str = "performance"
+    DATABASE_POOL_SIZE: Optional[int] = None
+    DATABASE_POOL_TIMEOUT: Optional[float] = None
+    RENDER_CACHE_SIZE: int = 1024
+    # Limits on parsing user-submitted markdown, or None for no limit. See
+    # ParseGuard.
+    PARSE_MAX_LENGTH: Optional[int] = 200000
+    PARSE_MAX_DEPTH: Optional[int] = None
+    PARSE_MAX_WORK: Optional[int] = 50000
     TESTING: bool = False
 
 
@@ -24,6 +39,39 @@ class EnvironmentConfig(AmanuensisConfig):
     DATABASE_URI = os.environ.get(
         "AMANUENSIS_DATABASE_URI", AmanuensisConfig.DATABASE_URI
     )
+    DATABASE_PROFILE = os.environ.get(
+        "AMANUENSIS_DATABASE_PROFILE", AmanuensisConfig.DATABASE_PROFILE
+    )
+    DATABASE_POOL_SIZE = (
+        int(os.environ["AMANUENSIS_DATABASE_POOL_SIZE"])
+        if os.environ.get("AMANUENSIS_DATABASE_POOL_SIZE")
+        else AmanuensisConfig.DATABASE_POOL_SIZE
+    )
+    DATABASE_POOL_TIMEOUT = (
+        float(os.environ["AMANUENSIS_DATABASE_POOL_TIMEOUT"])
+        if os.environ.get("AMANUENSIS_DATABASE_POOL_TIMEOUT")
+        else AmanuensisConfig.DATABASE_POOL_TIMEOUT
+    )
+    RENDER_CACHE_SIZE = int(
+        os.environ.get(
+            "AMANUENSIS_RENDER_CACHE_SIZE", AmanuensisConfig.RENDER_CACHE_SIZE
+        )
+    )
+    PARSE_MAX_LENGTH = (
+        optional_int(os.environ["AMANUENSIS_PARSE_MAX_LENGTH"])
+        if os.environ.get("AMANUENSIS_PARSE_MAX_LENGTH")
+        else AmanuensisConfig.PARSE_MAX_LENGTH
+    )
+    PARSE_MAX_DEPTH = (
+        optional_int(os.environ["AMANUENSIS_PARSE_MAX_DEPTH"])
+        if os.environ.get("AMANUENSIS_PARSE_MAX_DEPTH")
+        else AmanuensisConfig.PARSE_MAX_DEPTH
+    )
+    PARSE_MAX_WORK = (
+        optional_int(os.environ["AMANUENSIS_PARSE_MAX_WORK"])
+        if os.environ.get("AMANUENSIS_PARSE_MAX_WORK")
+        else AmanuensisConfig.PARSE_MAX_WORK
+    )
     TESTING = os.environ.get("AMANUENSIS_TESTING", "").lower() in ("true", "1")
 
 
@@ -36,6 +84,39 @@ class CommandLineConfig(AmanuensisConfig):
         parser.add_argument("--static-root", default=AmanuensisConfig.STATIC_ROOT)
         parser.add_argument("--secret-key", default=AmanuensisConfig.SECRET_KEY)
         parser.add_argument("--database-uri", default=AmanuensisConfig.DATABASE_URI)
+        parser.add_argument(
+            "--database-profile", default=AmanuensisConfig.DATABASE_PROFILE
+        )
+        parser.add_argument(
+            "--database-pool-size",
+            type=int,
+            default=AmanuensisConfig.DATABASE_POOL_SIZE,
+        )
+        parser.add_argument(
+            "--database-pool-timeout",
+            type=float,
+            default=AmanuensisConfig.DATABASE_POOL_TIMEOUT,
+        )
+        parser.add_argument(
+            "--render-cache-size",
+            type=int,
+            default=AmanuensisConfig.RENDER_CACHE_SIZE,
+        )
+        parser.add_argument(
+            "--parse-max-length",
+            type=optional_int,
+            default=AmanuensisConfig.PARSE_MAX_LENGTH,
+        )
+        parser.add_argument(
+            "--parse-max-depth",
+            type=optional_int,
+            default=AmanuensisConfig.PARSE_MAX_DEPTH,
+        )
+        parser.add_argument(
+            "--parse-max-work",
+            type=optional_int,
+            default=AmanuensisConfig.PARSE_MAX_WORK,
+        )
         parser.add_argument("--debug", action="store_true")
         args = parser.parse_args()
 
@@ -43,4 +124,11 @@ class CommandLineConfig(AmanuensisConfig):
         self.STATIC_ROOT = args.static_root
         self.SECRET_KEY = args.secret_key
         self.DATABASE_URI = args.database_uri
+        self.DATABASE_PROFILE = args.database_profile
+        self.DATABASE_POOL_SIZE = args.database_pool_size
+        self.DATABASE_POOL_TIMEOUT = args.database_pool_timeout
+        self.RENDER_CACHE_SIZE = args.render_cache_size
+        self.PARSE_MAX_LENGTH = args.parse_max_length
+        self.PARSE_MAX_DEPTH = args.parse_max_depth
+        self.PARSE_MAX_WORK = args.parse_max_work
         self.TESTING = args.debug
@@ -6,12 +6,14 @@ from .models import (
     Character,
     ArticleState,
     Article,
+    ArticleCitation,
     IndexType,
     ArticleIndex,
     ArticleIndexRule,
     ArticleContentRuleType,
     ArticleContentRule,
     Post,
+    SchemaMigration,
 )
 
 __all__ = [
@@ -22,10 +24,12 @@ __all__ = [
     "Character",
     "ArticleState",
     "Article",
+    "ArticleCitation",
     "IndexType",
     "ArticleIndex",
     "ArticleIndexRule",
     "ArticleContentRuleType",
     "ArticleContentRule",
     "Post",
+    "SchemaMigration",
 ]
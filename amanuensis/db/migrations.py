@@ -0,0 +1,271 @@
+"""
+Versioned schema migrations for existing databases
+"""
+import logging
+from typing import Any, Callable, List, Optional, Sequence
+
+from sqlalchemy import Column, Table, func, inspect, literal, or_, select, update
+from sqlalchemy.schema import CreateColumn
+
+from amanuensis.parser import scan_citations
+
+from .database import DbContext
+from .models import (
+    Article,
+    ArticleCitation,
+    ArticleIndexRule,
+    Character,
+    Lexicon,
+    Membership,
+    Post,
+    SchemaMigration,
+)
+
+
+LOG = logging.getLogger(__name__)
+
+# The number of rows a backfill writes in each transaction
+BATCH_SIZE = 1000
+
+# A migration step. Steps commit their own work.
+Step = Callable[[DbContext], None]
+
+
+class Migration:
+    """
+    A numbered schema change made up of steps that run in order. Each step
+    commits its own work, so a long step does not hold the database's write
+    lock for the whole migration. Since a migration that is interrupted is
+    run again from its first step, steps must be safe to repeat.
+    """
+
+    def __init__(self, version: int, description: str, steps: Sequence[Step]):
+        self.version = version
+        self.description = description
+        self.steps = steps
+
+    def __repr__(self) -> str:
+        return f"<Migration {self.version}: {self.description}>"
+
+
+def create_table(table: Table) -> Step:
+    """Creates a table and its indices if it does not exist."""
+
+    def step(db: DbContext) -> None:
+        table.create(db.engine, checkfirst=True)
+
+    return step
+
+
+def add_column(column: Column, default: Any = None) -> Step:
+    """
+    Adds a column to its table if it does not exist. `default` fills the
+    column in existing rows, and must be given for a non-nullable column.
+    """
+
+    def step(db: DbContext) -> None:
+        table: Table = column.table
+        extant = {col["name"] for col in inspect(db.engine).get_columns(table.name)}
+        if column.name in extant:
+            return
+        dialect = db.engine.dialect
+        ddl = (
+            f"ALTER TABLE {dialect.identifier_preparer.format_table(table)}"
+            f" ADD COLUMN {CreateColumn(column).compile(dialect=dialect)}"
+        )
+        if default is not None:
+            default_sql = literal(default).compile(
+                dialect=dialect, compile_kwargs={"literal_binds": True}
+            )
+            ddl += f" DEFAULT {default_sql}"
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(ddl)
+
+    return step
+
+
+def create_index(table: Table, name: str) -> Step:
+    """
+    Creates one of a table's indices if it does not exist. The index is
+    built in its own short transaction, so in WAL mode readers are not
+    blocked while it is built.
+    """
+    (index,) = [index for index in table.indexes if index.name == name]
+
+    def step(db: DbContext) -> None:
+        index.create(db.engine, checkfirst=True)
+
+    return step
+
+
+def backfill(table: Table, where: Any, batch_size: int = BATCH_SIZE, **values) -> Step:
+    """
+    Sets `values` on the rows of a table matching `where`, committing every
+    `batch_size` rows. Setting the values must make a row stop matching
+    `where`, or the backfill will not finish.
+    """
+    (key,) = table.primary_key.columns
+
+    def step(db: DbContext) -> None:
+        while True:
+            batch = select(key).where(where).limit(batch_size).scalar_subquery()
+            result = db(
+                update(table)
+                .where(key.in_(batch))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            LOG.debug(f"Backfilled {result.rowcount} rows in {table.name}")
+            if result.rowcount < batch_size:
+                break
+
+    return step
+
+
+def backfill_citations(db: DbContext) -> None:
+    """Records the citations of published articles that have none recorded."""
+    last_id = 0
+    while True:
+        articles: List[Article] = (
+            db(
+                select(Article)
+                .where(Article.id > last_id)
+                .where(Article.turn.is_not(None))
+                .where(~Article.citations.any())
+                .order_by(Article.id)
+                .limit(BATCH_SIZE)
+            )
+            .scalars()
+            .all()
+        )
+        if not articles:
+            break
+        for article in articles:
+            db.session.add_all(
+                [
+                    ArticleCitation(
+                        article_id=article.id,
+                        target=target,
+                        lexicon_id=article.lexicon_id,
+                    )
+                    for target in dict.fromkeys(scan_citations(article.body))
+                ]
+            )
+        db.session.commit()
+        last_id = articles[-1].id
+
+
+# The number of posts a membership has not seen. This is repeated here
+# rather than imported from the backend so that the migration does not
+# change if the backend does.
+unread_post_count = (
+    select(func.count(Post.id))
+    .where(Post.lexicon_id == Membership.lexicon_id)
+    .where(
+        or_(
+            Membership.last_post_seen.is_(None),
+            Post.created > Membership.last_post_seen,
+        )
+    )
+    .correlate(Membership)
+    .scalar_subquery()
+)
+
+
+# All migrations, in the order they are applied
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "Add the citation table and cached article HTML",
+        [
+            create_table(ArticleCitation.__table__),
+            add_column(Article.__table__.c.rendered_html),
+            add_column(Article.__table__.c.citation_fingerprint),
+            create_index(Article.__table__, "ix_article_lexicon_id_title"),
+            backfill_citations,
+        ],
+    ),
+    Migration(
+        2,
+        "Add the lexicon index version",
+        [add_column(Lexicon.__table__.c.index_version, default=0)],
+    ),
+    Migration(
+        3,
+        "Add indices for frequent lexicon queries",
+        [
+            create_index(Membership.__table__, "ix_membership_lexicon_id"),
+            create_index(Character.__table__, "ix_character_lexicon_id_user_id"),
+            create_index(Article.__table__, "ix_article_lexicon_id_state_turn"),
+            create_index(
+                ArticleIndexRule.__table__, "ix_article_index_rule_lexicon_id_turn"
+            ),
+            create_index(Post.__table__, "ix_post_lexicon_id_created"),
+        ],
+    ),
+    Migration(
+        4,
+        "Add unread post counters to memberships",
+        [
+            add_column(Membership.__table__.c.unread_post_count, default=0),
+            backfill(
+                Membership.__table__,
+                Membership.unread_post_count != unread_post_count,
+                unread_post_count=unread_post_count,
+            ),
+        ],
+    ),
+]
+
+
+def get_applied(db: DbContext) -> List[int]:
+    """Returns the versions of the migrations applied to the database."""
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    return list(
+        db(select(SchemaMigration.version).order_by(SchemaMigration.version)).scalars()
+    )
+
+
+def get_pending(db: DbContext) -> List[Migration]:
+    """Returns the migrations not yet applied to the database, in order."""
+    applied = set(get_applied(db))
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+def migrate(db: DbContext, target: Optional[int] = None) -> List[Migration]:
+    """
+    Applies pending migrations up to and including version `target`, or all
+    pending migrations if no target is given. Returns the migrations applied.
+    """
+    applied = []
+    for migration in get_pending(db):
+        if target is not None and migration.version > target:
+            break
+        LOG.info(f"Applying migration {migration.version}: {migration.description}")
+        # Don't hold a transaction open across steps
+        db.session.commit()
+        for step in migration.steps:
+            step(db)
+        db.session.add(
+            SchemaMigration(
+                version=migration.version, description=migration.description
+            )
+        )
+        db.session.commit()
+        applied.append(migration)
+    return applied
+
+
+def stamp(db: DbContext) -> None:
+    """
+    Records every migration as applied without running it, for a database
+    whose schema was just created at the latest version.
+    """
+    for migration in get_pending(db):
+        db.session.add(
+            SchemaMigration(
+                version=migration.version, description=migration.description
+            )
+        )
+    db.session.commit()
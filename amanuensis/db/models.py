@@ -12,6 +12,7 @@ from sqlalchemy import (
     Enum,
     ForeignKey,
     func,
+    Index,
     Integer,
     String,
     Text,
@@ -241,6 +242,14 @@ class Lexicon(ModelBase):
     # Show other players' progress for the current turn
     show_peer_progress = Column(Boolean, nullable=False, default=True)
 
+    ##################
+    # Index settings #
+    ##################
+
+    # Incremented whenever the lexicon's indices or index rules change, so
+    # that cached index schemas can be rebuilt
+    index_version = Column(Integer, nullable=False, default=0)
+
     #############################
     # Foreign key relationships #
     #############################
@@ -270,7 +279,12 @@ class Membership(ModelBase):
     """
 
     __tablename__ = "membership"
-    __table_args__ = (UniqueConstraint("user_id", "lexicon_id"),)
+    __table_args__ = (
+        # Also serves membership lookups by user and lexicon
+        UniqueConstraint("user_id", "lexicon_id"),
+        # Member lists and unread counts within a lexicon
+        Index("ix_membership_lexicon_id", "lexicon_id"),
+    )
 
     ###################
     # Membership keys #
@@ -296,6 +310,10 @@ class Membership(ModelBase):
     # This is NULL if the player has never viewed posts
     last_post_seen = Column(DateTime, nullable=True)
 
+    # The number of posts made since the user last viewed the post feed
+    # This is kept up to date when posts are made and the feed is viewed
+    unread_post_count = Column(Integer, nullable=False, default=0)
+
     ###################
     # Player settings #
     ###################
@@ -330,6 +348,10 @@ class Character(ModelBase):
     """
 
     __tablename__ = "character"
+    __table_args__ = (
+        # Character lists within a lexicon, by player
+        Index("ix_character_lexicon_id_user_id", "lexicon_id", "user_id"),
+    )
 
     ##################
     # Character info #
@@ -379,6 +401,12 @@ class Article(ModelBase):
     """
 
     __tablename__ = "article"
+    __table_args__ = (
+        # Article lookups by title within a lexicon
+        Index("ix_article_lexicon_id_title", "lexicon_id", "title"),
+        # Article lists within a lexicon, by state and turn
+        Index("ix_article_lexicon_id_state_turn", "lexicon_id", "state", "turn"),
+    )
 
     ################
     # Article info #
@@ -443,6 +471,18 @@ class Article(ModelBase):
     # The article's text
     body = Column(Text, nullable=False)
 
+    ####################
+    # Rendered content #
+    ####################
+
+    # The article's rendered HTML, cached when the article is published or
+    # viewed. This is NULL until the article is rendered, and it is reset
+    # when a title the article cites goes from phantom to extant.
+    rendered_html = Column(Text, nullable=True)
+
+    # A hash of the titles that were extant when the HTML was rendered
+    citation_fingerprint = Column(String, nullable=True)
+
     #############################
     # Foreign key relationships #
     #############################
@@ -450,6 +490,41 @@ class Article(ModelBase):
     lexicon = relationship("Lexicon", back_populates="articles")
     character = relationship("Character", back_populates="articles")
     addenda = relationship("Article", backref=backref("parent", remote_side=[id]))
+    citations = relationship(
+        "ArticleCitation", back_populates="article", cascade="all, delete-orphan"
+    )
+
+
+class ArticleCitation(ModelBase):
+    """
+    Represents a citation from a published article to a title. The cited
+    title may not have been written yet, in which case it is a phantom.
+    """
+
+    __tablename__ = "citation"
+    __table_args__ = (
+        # Reverse lookups of the articles citing a title
+        Index("ix_citation_lexicon_id_target", "lexicon_id", "target"),
+    )
+
+    #################
+    # Citation info #
+    #################
+
+    # The article containing the citation
+    article_id = Column(Integer, ForeignKey("article.id"), primary_key=True)
+
+    # The normalized title that is cited
+    target = Column(String, primary_key=True)
+
+    # The lexicon of the citing article, to which the cited title belongs
+    lexicon_id = Column(Integer, ForeignKey("lexicon.id"), nullable=False)
+
+    #############################
+    # Foreign key relationships #
+    #############################
+
+    article = relationship("Article", back_populates="citations")
 
 
 class IndexType(enum.Enum):
@@ -520,7 +595,11 @@ class ArticleIndexRule(ModelBase):
     """
 
     __tablename__ = "article_index_rule"
-    __table_args__ = (UniqueConstraint("character_id", "index_id", "turn"),)
+    __table_args__ = (
+        UniqueConstraint("character_id", "index_id", "turn"),
+        # Index rule lists within a lexicon, by turn
+        Index("ix_article_index_rule_lexicon_id_turn", "lexicon_id", "turn"),
+    )
 
     ###################
     # Index rule info #
@@ -636,6 +715,10 @@ class Post(ModelBase):
     """
 
     __tablename__ = "post"
+    __table_args__ = (
+        # The post feed of a lexicon, in order of creation
+        Index("ix_post_lexicon_id_created", "lexicon_id", "created"),
+    )
 
     #############
     # Post info #
@@ -667,3 +750,20 @@ class Post(ModelBase):
 
     user = relationship("User", back_populates="posts")
     lexicon = relationship("Lexicon", back_populates="posts")
+
+
+class SchemaMigration(ModelBase):
+    """
+    Represents a schema migration that has been applied to the database.
+    """
+
+    __tablename__ = "schema_migration"
+
+    # The version number of the migration
+    version = Column(Integer, primary_key=True)
+
+    # A description of the migration
+    description = Column(String, nullable=False)
+
+    # The timestamp the migration was applied
+    applied = Column(DateTime, nullable=False, server_default=func.now())
@@ -0,0 +1,247 @@
+"""
+Static-site export of a lexicon's published pages
+"""
+
+import hashlib
+from html import escape
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from amanuensis.backend import artiq
+from amanuensis.backend.article import ArticleHtmlRenderer
+from amanuensis.db import Article, ArticleCitation, DbContext, Lexicon
+from amanuensis.parser import (
+    WordCounter,
+    filesafe_title,
+    parse_raw_markdown,
+    render_many,
+    titlesort,
+)
+from amanuensis.resources import get_stream
+
+
+# Static assets referenced by exported pages
+ASSETS = ("page.css", "amanuensis.png")
+
+
+def page_name(title: str) -> str:
+    """
+    Returns the file name of an article page. filesafe_title is lossy, so
+    a hash of the title is added to keep different titles from sharing a
+    file.
+    """
+    digest = hashlib.blake2b(title.encode("utf8"), digest_size=8).hexdigest()
+    return f"{filesafe_title(title)}.{digest}.html"
+
+
+class StaticArticleRenderer(ArticleHtmlRenderer):
+    """Renders article HTML with links between the exported article pages."""
+
+    def link(self, title: str) -> str:
+        return page_name(title)
+
+
+def hashed_assets() -> Dict[str, Tuple[str, bytes]]:
+    """
+    Returns the static assets, mapping each asset name to a file name that
+    includes a hash of its content, so that it can be served with a long
+    cache lifetime, and to its content.
+    """
+    assets = {}
+    for name in ASSETS:
+        data = get_stream(name).read()
+        stem, ext = os.path.splitext(name)
+        digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+        assets[name] = (f"{stem}.{digest}{ext}", data)
+    return assets
+
+
+def render_page(
+    lexicon: Lexicon, title: str, body: str, assets: Dict[str, str], root: str
+) -> str:
+    """Wraps page content in the static page layout."""
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8"/>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <title>{escape(title)} | {escape(lexicon.full_title)}</title>
+    <link rel="icon" type="image/png" href="{root}assets/{assets['amanuensis.png']}">
+    <link rel="stylesheet" href="{root}assets/{assets['page.css']}">
+</head>
+<body>
+    <main>
+        <header>
+            <h2>{escape(lexicon.full_title)}</h2>
+            <p><i>{escape(lexicon.prompt)}</i></p>
+        </header>
+        <nav>
+            <table>
+                <tr><td><a href="{root}index.html">Contents</a></td></tr>
+                <tr><td><a href="{root}statistics.html">Statistics</a></td></tr>
+            </table>
+        </nav>
+        <article class="content-2col">
+{body}
+        </article>
+    </main>
+</body>
+</html>
+"""
+
+
+def title_links(titles: Iterable[str], root: str, written: Set[str]) -> str:
+    """Renders a list of links to article pages, sorted by title."""
+    links = []
+    for title in sorted(titles, key=titlesort):
+        link = escape(f"{root}{page_name(title)}")
+        link_class = "" if title in written else ' class="phantom"'
+        links.append(f'<a href="{link}"{link_class}>{escape(title)}</a>')
+    return " / ".join(links)
+
+
+def export_lexicon(
+    db: DbContext, lexicon: Lexicon, output: str, max_workers: Optional[int] = 1
+) -> int:
+    """
+    Writes the contents, article, phantom, and statistics pages of a lexicon
+    to a static site directory and returns the number of pages written.
+    Articles are rendered by up to `max_workers` processes, or one per CPU
+    if it is None.
+
+    The site is built in a new directory next to `output`, and `output` is
+    then atomically replaced with a symlink to it, so a file server never
+    sees a partially written site. The previous build is removed afterwards.
+    """
+    articles: List[Article] = list(artiq.get_published(db, lexicon.id))
+    written: Set[str] = {article.title for article in articles}
+
+    # Build the citation graph from the citation table
+    cites: Dict[str, List[str]] = {article.title: [] for article in articles}
+    citedby: Dict[str, List[str]] = {}
+    for citer, target in db(
+        select(Article.title, ArticleCitation.target)
+        .join(ArticleCitation, ArticleCitation.article_id == Article.id)
+        .where(ArticleCitation.lexicon_id == lexicon.id)
+    ):
+        cites[citer].append(target)
+        citedby.setdefault(target, []).append(citer)
+    phantoms: Set[str] = set(citedby) - written
+    all_titles = sorted(written | phantoms, key=titlesort)
+
+    # Build the site in a fresh directory beside the output path
+    output = os.path.abspath(output.rstrip(os.sep))
+    parent = os.path.dirname(output)
+    os.makedirs(parent, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(output)}.", dir=parent)
+    os.chmod(build_dir, 0o755)
+    try:
+        os.makedirs(os.path.join(build_dir, "assets"))
+        os.makedirs(os.path.join(build_dir, "article"))
+        assets: Dict[str, str] = {}
+        for name, (hashed_name, data) in hashed_assets().items():
+            assets[name] = hashed_name
+            with open(os.path.join(build_dir, "assets", hashed_name), "wb") as f:
+                f.write(data)
+
+        def write_page(path: str, title: str, body: str, root: str) -> None:
+            with open(os.path.join(build_dir, path), "w", encoding="utf8") as f:
+                f.write(render_page(lexicon, title, body, assets, root))
+
+        # Contents page
+        write_page(
+            "index.html",
+            "Contents",
+            "<section>\n<ul>\n"
+            + "\n".join(
+                f"<li>{title_links([title], 'article/', written)}</li>"
+                for title in all_titles
+            )
+            + "\n</ul>\n</section>",
+            "",
+        )
+        pages = 1
+
+        # Article pages, rendered in parallel for large lexicons if allowed
+        html_by_title = dict(
+            zip(
+                [article.title for article in articles],
+                render_many(
+                    [article.body for article in articles],
+                    StaticArticleRenderer(lexicon.name, written),
+                    max_workers=max_workers,
+                ),
+            )
+        )
+        for title in all_titles:
+            if title in written:
+                content = html_by_title[title]
+            else:
+                content = "<p><i>This article has not been written yet.</i></p>"
+            cites_links = title_links(cites.get(title, []), "", written)
+            citedby_links = title_links(citedby.get(title, []), "", written)
+            write_page(
+                os.path.join("article", page_name(title)),
+                title,
+                f"<section>\n<h1>{escape(title)}</h1>\n{content}\n</section>\n"
+                f"<section>\n<p>{cites_links}</p>\n<p>{citedby_links}</p>\n</section>",
+                "../",
+            )
+            pages += 1
+
+        # Statistics page
+        word_counts = {
+            article.title: sum(
+                parse_raw_markdown(article.body, single_pass=True).render(WordCounter())
+            )
+            for article in articles
+        }
+        most_cited = sorted(
+            citedby.items(), key=lambda item: (-len(item[1]), titlesort(item[0]))
+        )[:10]
+        write_page(
+            "statistics.html",
+            "Statistics",
+            "<section>\n"
+            f"<p>Articles written: {len(written)}</p>\n"
+            f"<p>Phantom articles: {len(phantoms)}</p>\n"
+            f"<p>Total words: {sum(word_counts.values())}</p>\n"
+            "<p>Most cited:</p>\n<ol>\n"
+            + "\n".join(
+                f"<li>{title_links([title], 'article/', written)} ({len(citers)})</li>"
+                for title, citers in most_cited
+            )
+            + "\n</ol>\n</section>",
+            "",
+        )
+        pages += 1
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    # Swap the new build in with an atomic rename of a symlink
+    build_prefix = f".{os.path.basename(output)}."
+    previous = None
+    if os.path.islink(output):
+        # Only remove the previous target if it is one of our builds, since
+        # the link may have been pointed somewhere else
+        target = os.path.realpath(output)
+        in_parent = os.path.dirname(target) == os.path.realpath(parent)
+        if in_parent and os.path.basename(target).startswith(build_prefix):
+            previous = target
+    elif os.path.exists(output):
+        # A plain directory can't be replaced atomically, so move it aside
+        # first; later exports will use the symlink.
+        previous = tempfile.mkdtemp(prefix=build_prefix, dir=parent)
+        os.rmdir(previous)
+        os.rename(output, previous)
+    link = f"{build_dir}.link"
+    os.symlink(os.path.basename(build_dir), link)
+    os.replace(link, output)
+    if previous and os.path.isdir(previous):
+        shutil.rmtree(previous)
+    return pages
@@ -2,14 +2,28 @@
 Module encapsulating all markdown parsing functionality.
 """
 
-from .core import RenderableVisitor
+from .batch import parse_many, render_many
+from .cache import RenderCache
+from .core import FoldingVisitor, RenderableVisitor, StreamingVisitor
+from .guard import ParseGuard
 from .helpers import normalize_title, filesafe_title, titlesort
-from .parsing import parse_raw_markdown
+from .parsing import iter_paragraphs, parse_raw_markdown, scan_citations
+from .wordcount import WordCounter, count_words
 
 __all__ = [
+    "RenderCache",
+    "FoldingVisitor",
     "RenderableVisitor",
+    "StreamingVisitor",
+    "ParseGuard",
     "normalize_title",
     "filesafe_title",
     "titlesort",
     "parse_raw_markdown",
+    "iter_paragraphs",
+    "parse_many",
+    "render_many",
+    "scan_citations",
+    "WordCounter",
+    "count_words",
 ]
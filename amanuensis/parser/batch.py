@@ -0,0 +1,93 @@
+"""
+Internal module encapsulating batch parsing and rendering of Lexipython
+markdown across a pool of worker processes.
+
+Starting a process pool is too slow and too heavy to do inside a web
+request, so batches are processed serially unless the caller opts in to
+the pool by passing `max_workers`. Only offline paths such as the CLI
+should do so.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+from typing import Any, Callable, List, Optional, Sequence
+
+from .core import ParsedArticle
+from .singlepass import SinglePassParser
+
+
+# Batches smaller than this are processed serially, since starting the
+# workers and pickling the results costs more than parsing a few articles
+SERIAL_THRESHOLD = 32
+
+# Each worker is sent this many chunks on average, which keeps workers
+# busy when article lengths vary without sending every body separately
+CHUNKS_PER_WORKER = 4
+
+
+def _parse_body(body: str) -> ParsedArticle:
+    return SinglePassParser(body).parse()
+
+
+def _render_body(renderer: Any, body: str) -> Any:
+    return SinglePassParser(body).parse().render(renderer)
+
+
+def _map(
+    func: Callable[[str], Any],
+    bodies: Sequence[str],
+    max_workers: Optional[int],
+    chunksize: Optional[int],
+    serial_threshold: int,
+) -> List[Any]:
+    """Applies a function to each body, in a process pool if worthwhile."""
+    workers = max_workers if max_workers is not None else os.cpu_count() or 1
+    if workers < 2 or len(bodies) < max(serial_threshold, 2):
+        return [func(body) for body in bodies]
+    workers = min(workers, len(bodies))
+    if chunksize is None:
+        chunksize = max(1, len(bodies) // (workers * CHUNKS_PER_WORKER))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, bodies, chunksize=chunksize))
+
+
+def parse_many(
+    bodies: Sequence[str],
+    max_workers: Optional[int] = 1,
+    chunksize: Optional[int] = None,
+    serial_threshold: int = SERIAL_THRESHOLD,
+) -> List[ParsedArticle]:
+    """
+    Parses a batch of markdown bodies, returning the token trees in the
+    same order. By default the bodies are parsed in this process. If
+    `max_workers` is more than 1, or None for one per CPU, large batches
+    are split into chunks and parsed by a pool of that many processes.
+    Batches smaller than `serial_threshold` are always parsed in this
+    process.
+    """
+    return _map(_parse_body, bodies, max_workers, chunksize, serial_threshold)
+
+
+def render_many(
+    bodies: Sequence[str],
+    renderer: Any,
+    max_workers: Optional[int] = 1,
+    chunksize: Optional[int] = None,
+    serial_threshold: int = SERIAL_THRESHOLD,
+) -> List[Any]:
+    """
+    Parses and renders a batch of markdown bodies, returning the render
+    results in the same order. Workers are used as in `parse_many`.
+    Parsing and rendering both happen in the workers, so only the bodies
+    and results are sent between processes. The renderer and its results
+    must be picklable, and each worker renders with its own copy of the
+    renderer.
+    """
+    return _map(
+        partial(_render_body, renderer),
+        bodies,
+        max_workers,
+        chunksize,
+        serial_threshold,
+    )
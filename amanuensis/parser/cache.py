@@ -0,0 +1,150 @@
+"""
+Internal module encapsulating a content-addressed cache of parsed and
+rendered Lexipython markdown.
+"""
+
+from collections import OrderedDict
+import hashlib
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from .core import ParsedArticle, SpanContainer, Visitor
+from .guard import ParseGuard
+from .parsing import parse_raw_markdown
+from .singlepass import SinglePassParser
+
+
+# Cache entries are keyed by the body hash, the kind of entry, and a
+# version. The kind is None for a token tree, "paragraph" for a paragraph
+# tree, or the renderer type for a render result.
+CacheKey = Tuple[str, Union[None, str, type], Hashable]
+
+# Returned by a cache lookup that misses, since None is a valid entry
+_MISSING = object()
+
+
+def body_hash(body: str) -> str:
+    """Returns the content address of a markdown body."""
+    return hashlib.blake2b(body.encode("utf8"), digest_size=16).hexdigest()
+
+
+class RenderCache:
+    """
+    A bounded LRU cache of parsed token trees and render results.
+
+    Token trees are keyed by the hash of the markdown body. Render results
+    are additionally keyed by the renderer type and a caller-supplied
+    version, which must change whenever the state the renderer depends on
+    changes, e.g. when a cited title goes from phantom to extant. Cached
+    trees are shared between callers and must not be modified.
+
+    Paragraph trees can also be cached individually, so that an article
+    being edited only has its changed paragraphs parsed again.
+
+    If a ParseGuard is given, every body is parsed under its limits.
+    """
+
+    def __init__(self, capacity: int = 1024, guard: Optional[ParseGuard] = None):
+        if capacity < 1:
+            raise ValueError("Cache capacity must be positive")
+        self.capacity: int = capacity
+        self.guard: Optional[ParseGuard] = guard
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: "OrderedDict[CacheKey, Any]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def parse(self, body: str) -> ParsedArticle:
+        """Returns the token tree for a markdown body."""
+        return self._parse(body_hash(body), body)
+
+    def parse_incremental(self, body: str) -> ParsedArticle:
+        """
+        Returns the token tree for a markdown body, reusing the tree of
+        any paragraph that has been parsed before. No formatting applies
+        across paragraphs, so only new or changed paragraphs are parsed.
+        """
+        guard = self.guard
+        if guard and not guard.check_length(body):
+            return guard.parse(body)
+        # Parse the missing paragraphs with one parser, so that the guard's
+        # work limit applies to the body as a whole
+        parser = guard.parser(body) if guard else SinglePassParser(body)
+        paragraphs: List[SpanContainer] = []
+        for start, end in parser.paragraph_bounds():
+            key: CacheKey = (body_hash(body[start:end]), "paragraph", None)
+            paragraph = self._lookup(key)
+            if paragraph is _MISSING:
+                paragraph = parser.parse_paragraph(start, end)
+                # A paragraph cut short by the work limit depends on the rest
+                # of the body, so it can't be reused
+                if not parser.work_limited:
+                    self._store(key, paragraph)
+            paragraphs.append(paragraph)
+        if guard:
+            guard.record(parser)
+        return ParsedArticle(paragraphs)
+
+    def render(self, body: str, renderer: Visitor, version: Hashable = None) -> Any:
+        """Returns the result of rendering a markdown body."""
+        digest = body_hash(body)
+        return self._get(
+            (digest, type(renderer), version),
+            lambda: self._parse(digest, body).render(renderer),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the cache size and hit, miss, and eviction counts."""
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        """Empties the cache without resetting the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def _parse(self, digest: str, body: str) -> ParsedArticle:
+        """Looks up the token tree for a body by its hash."""
+        guard = self.guard
+        if guard:
+            return self._get((digest, None, None), lambda: guard.parse(body))
+        return self._get(
+            (digest, None, None), lambda: parse_raw_markdown(body, single_pass=True)
+        )
+
+    def _get(self, key: CacheKey, compute: Callable[[], Any]) -> Any:
+        """Looks up a cache entry, computing and storing it on a miss."""
+        value = self._lookup(key)
+        if value is _MISSING:
+            # Compute outside the lock so a slow parse doesn't block other hits
+            value = compute()
+            self._store(key, value)
+        return value
+
+    def _lookup(self, key: CacheKey) -> Any:
+        """Looks up a cache entry, returning _MISSING on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        return _MISSING
+
+    def _store(self, key: CacheKey, value: Any) -> None:
+        """Stores a cache entry, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
@@ -5,13 +5,48 @@ which can be operated on by a visitor defining functions that hook off
 of the different token types.
 """
 
-from typing import Callable, Any, Sequence
+from typing import (
+    Callable,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
 
 from .helpers import normalize_title
 
 
 RenderHook = Callable[["Renderable"], Any]
 Spans = Sequence["Renderable"]
+Visitor = Union["RenderableVisitor", "FoldingVisitor", "StreamingVisitor"]
+
+# Hook tables for folding and streaming visitor classes, mapping token
+# classes to the hooks the visitor declares
+_hook_tables: Dict[type, Dict[type, Optional[Callable]]] = {}
+
+
+def resolve_hook(visitor_type: type, token_type: type) -> Optional[Callable]:
+    """
+    Looks up the unbound hook a visitor class declares for a token class
+    and records it in the hook tables. Hooks are looked up by name once
+    per visitor class and then reused for every token.
+    """
+    hook = getattr(visitor_type, token_type.__name__, None)
+    _hook_tables.setdefault(visitor_type, {})[token_type] = hook
+    return hook
+
+
+def visit(span: "Renderable", renderer: "RenderableVisitor") -> Any:
+    """Executes the hook a recursive visitor declares for a token, if any."""
+    hook: Optional[RenderHook] = getattr(renderer, type(span).__name__, None)
+    if hook:
+        return hook(span)
+    return None
 
 
 class Renderable:
@@ -20,21 +55,29 @@ class Renderable:
     visiting the token tree.
     """
 
-    def render(self: "Renderable", renderer: "RenderableVisitor"):
+    # Token classes declare slots so that large trees don't carry a
+    # __dict__ on every node
+    __slots__ = ()
+
+    def render(self: "Renderable", renderer: Visitor):
         """
         Execute the apppropriate visitor method on this Renderable.
         Visitors implement hooks by declaring methods whose names are
-        the name of a Renderable class.
+        the name of a Renderable class. Folding and streaming visitors
+        are applied to the whole subtree at once.
         """
-        hook: RenderHook = getattr(renderer, type(self).__name__, None)
-        if hook:
-            return hook(self)
-        return None
+        if isinstance(renderer, FoldingVisitor):
+            return renderer.fold(self)
+        if isinstance(renderer, StreamingVisitor):
+            return renderer.render_string(self)
+        return visit(self, renderer)
 
 
 class TextSpan(Renderable):
     """A length of text."""
 
+    __slots__ = ("innertext",)
+
     def __init__(self, innertext: str):
         self.innertext = innertext
 
@@ -43,7 +86,19 @@ class TextSpan(Renderable):
 
 
 class LineBreak(Renderable):
-    """A line break within a paragraph."""
+    """
+    A line break within a paragraph. Line breaks carry no data, so every
+    instantiation returns the same shared instance.
+    """
+
+    __slots__ = ()
+
+    _instance: Optional["LineBreak"] = None
+
+    def __new__(cls) -> "LineBreak":
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
     def __repr__(self):
         return "<break>"
@@ -52,8 +107,11 @@ class LineBreak(Renderable):
 class SpanContainer(Renderable):
     """A formatting element that wraps some amount of text."""
 
+    __slots__ = ("spans",)
+
     def __init__(self, spans: Spans):
-        self.spans: Spans = spans
+        # Store children as a tuple, which is smaller than a list
+        self.spans: Spans = tuple(spans)
 
     def __repr__(self):
         return (
@@ -62,32 +120,45 @@ class SpanContainer(Renderable):
         )
 
     def recurse(self, renderer: "RenderableVisitor"):
-        return [child.render(renderer) for child in self.spans]
+        # Recursive visitors never fold or stream, so dispatch directly
+        return [visit(child, renderer) for child in self.spans]
 
 
 class ParsedArticle(SpanContainer):
     """Token tree root node, containing some number of paragraph tokens."""
 
+    __slots__ = ()
+
 
 class BodyParagraph(SpanContainer):
     """A normal paragraph."""
 
+    __slots__ = ()
+
 
 class SignatureParagraph(SpanContainer):
     """A paragraph preceded by a signature mark."""
 
+    __slots__ = ()
+
 
 class BoldSpan(SpanContainer):
     """A span of text inside bold marks."""
 
+    __slots__ = ()
+
 
 class ItalicSpan(SpanContainer):
     """A span of text inside italic marks."""
 
+    __slots__ = ()
+
 
 class CitationSpan(SpanContainer):
     """A citation to another article."""
 
+    __slots__ = ("cite_target",)
+
     def __init__(self, spans: Spans, cite_target: str):
         super().__init__(spans)
         # Normalize citation target on parse, since we don't want
@@ -136,3 +207,158 @@ class RenderableVisitor:
     def CitationSpan(self, span: CitationSpan):
         span.recurse(self)
         return self
+
+
+class FoldingVisitor:
+    """
+    Visitor whose container hooks receive the results of visiting their
+    children instead of recursing into them. This lets the tree be walked
+    with an explicit stack, so it costs no Python call frames per level.
+    Leaf hooks take the span; container hooks take the span and a list of
+    the child results. The default implementation returns None for every
+    token.
+    """
+
+    def TextSpan(self, span: TextSpan):
+        return None
+
+    def LineBreak(self, span: LineBreak):
+        return None
+
+    def ParsedArticle(self, span: ParsedArticle, children: List[Any]):
+        return None
+
+    def BodyParagraph(self, span: BodyParagraph, children: List[Any]):
+        return None
+
+    def SignatureParagraph(self, span: SignatureParagraph, children: List[Any]):
+        return None
+
+    def BoldSpan(self, span: BoldSpan, children: List[Any]):
+        return None
+
+    def ItalicSpan(self, span: ItalicSpan, children: List[Any]):
+        return None
+
+    def CitationSpan(self, span: CitationSpan, children: List[Any]):
+        return None
+
+    def fold(self, root: Renderable) -> Any:
+        """
+        Visits every token under `root`, children before their parents,
+        and returns the result of the hook for `root`.
+        """
+        visitor_type = type(self)
+        hooks = _hook_tables.setdefault(visitor_type, {})
+        if not isinstance(root, SpanContainer):
+            hook = hooks.get(type(root)) or resolve_hook(visitor_type, type(root))
+            return hook(self, root) if hook else None
+        # Each stack frame holds a container, an iterator over its
+        # children, and the results of the children visited so far
+        stack: List[Tuple[SpanContainer, Iterator[Renderable], List[Any]]] = [
+            (root, iter(root.spans), [])
+        ]
+        while stack:
+            span, remaining, results = stack[-1]
+            for child in remaining:
+                if isinstance(child, SpanContainer):
+                    stack.append((child, iter(child.spans), []))
+                    break
+                try:
+                    hook = hooks[type(child)]
+                except KeyError:
+                    hook = resolve_hook(visitor_type, type(child))
+                results.append(hook(self, child) if hook else None)
+            else:
+                # All children have been visited, so visit the container
+                stack.pop()
+                try:
+                    hook = hooks[type(span)]
+                except KeyError:
+                    hook = resolve_hook(visitor_type, type(span))
+                value = hook(self, span, results) if hook else None
+                if not stack:
+                    return value
+                stack[-1][2].append(value)
+
+
+class StreamingVisitor:
+    """
+    Visitor that produces text fragments in document order instead of
+    building up a value for each container. Leaf hooks take the span and
+    return a fragment. Container hooks take the span and return a tuple
+    of fragments to emit before its children, between each child, and
+    after its children. The default implementation emits nothing.
+    """
+
+    def TextSpan(self, span: TextSpan) -> str:
+        return ""
+
+    def LineBreak(self, span: LineBreak) -> str:
+        return ""
+
+    def ParsedArticle(self, span: ParsedArticle) -> Tuple[str, str, str]:
+        return ("", "", "")
+
+    def BodyParagraph(self, span: BodyParagraph) -> Tuple[str, str, str]:
+        return ("", "", "")
+
+    def SignatureParagraph(self, span: SignatureParagraph) -> Tuple[str, str, str]:
+        return ("", "", "")
+
+    def BoldSpan(self, span: BoldSpan) -> Tuple[str, str, str]:
+        return ("", "", "")
+
+    def ItalicSpan(self, span: ItalicSpan) -> Tuple[str, str, str]:
+        return ("", "", "")
+
+    def CitationSpan(self, span: CitationSpan) -> Tuple[str, str, str]:
+        return ("", "", "")
+
+    def stream(self, root: Renderable) -> Iterator[str]:
+        """
+        Yields the fragments for every token under `root`. The tree is
+        walked with an explicit stack, and nothing is joined, so callers
+        can write the fragments out as they are produced.
+        """
+        visitor_type = type(self)
+        hooks = _hook_tables.setdefault(visitor_type, {})
+        # Each stack frame holds an iterator over a container's children,
+        # the fragments to emit between and after them, and whether any
+        # child has been emitted yet
+        stack: List[List[Any]] = [[iter((root,)), "", "", False]]
+        while stack:
+            frame = stack[-1]
+            remaining, between, after, _ = frame
+            for child in remaining:
+                if frame[3] and between:
+                    yield between
+                frame[3] = True
+                try:
+                    hook = hooks[type(child)]
+                except KeyError:
+                    hook = resolve_hook(visitor_type, type(child))
+                if isinstance(child, SpanContainer):
+                    before, child_between, child_after = (
+                        hook(self, child) if hook else ("", "", "")
+                    )
+                    if before:
+                        yield before
+                    stack.append([iter(child.spans), child_between, child_after, False])
+                    break
+                fragment = hook(self, child) if hook else ""
+                if fragment:
+                    yield fragment
+            else:
+                stack.pop()
+                if after:
+                    yield after
+
+    def write(self, root: Renderable, out: TextIO) -> None:
+        """Writes the fragments for every token under `root` to a stream."""
+        for fragment in self.stream(root):
+            out.write(fragment)
+
+    def render_string(self, root: Renderable) -> str:
+        """Returns the fragments for every token under `root` as one string."""
+        return "".join(self.stream(root))
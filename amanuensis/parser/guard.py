@@ -0,0 +1,92 @@
+"""
+Internal module encapsulating limits on parsing untrusted Lexipython
+markdown.
+"""
+
+from threading import Lock
+from typing import Dict, List, Optional
+
+from .core import BodyParagraph, ParsedArticle, Renderable, SpanContainer, TextSpan
+from .singlepass import PARAGRAPH_BREAK, SinglePassParser
+
+
+class ParseGuard:
+    """
+    Parses text under limits on its length, the nesting depth of its
+    formatting marks, and the number of mark pairs searched for in a body.
+    Text past a limit is parsed as plain text rather than rejected, so a
+    hostile or malformed body still renders without tying up the worker.
+    Each limit hit is counted so that abusive inputs show up in the stats.
+
+    A limit of None disables that limit. The grammar already stops marks
+    nesting past three deep, so the depth limit is off by default and only
+    has an effect when set below that.
+    """
+
+    def __init__(
+        self,
+        max_length: Optional[int] = 200000,
+        max_depth: Optional[int] = None,
+        max_work: Optional[int] = 50000,
+    ):
+        self.max_length = max_length
+        self.max_depth = max_depth
+        self.max_work = max_work
+        self.length_hits: int = 0
+        self.depth_hits: int = 0
+        self.work_hits: int = 0
+        self._lock = Lock()
+
+    def parse(self, text: str) -> ParsedArticle:
+        """Parses a body of markdown into a Renderable tree."""
+        if not self.check_length(text):
+            return ParsedArticle(
+                [plain_paragraph(p) for p in PARAGRAPH_BREAK.split(text)]
+            )
+        parser = self.parser(text)
+        parsed = parser.parse()
+        self.record(parser)
+        return parsed
+
+    def parser(self, text: str) -> SinglePassParser:
+        """
+        Returns a parser for a body of text under the depth and work limits.
+        The work limit applies to everything the parser parses, so a body
+        parsed one paragraph at a time should use one parser. The caller is
+        responsible for checking the length limit first and for recording
+        the parse.
+        """
+        return SinglePassParser(text, self.max_depth, self.max_work)
+
+    def check_length(self, text: str) -> bool:
+        """Returns whether text is within the length limit, counting a hit if not."""
+        if self.max_length is not None and len(text) > self.max_length:
+            with self._lock:
+                self.length_hits += 1
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        """Returns the limits and the number of times each was hit."""
+        return {
+            "max_length": self.max_length,
+            "max_depth": self.max_depth,
+            "max_work": self.max_work,
+            "length_hits": self.length_hits,
+            "depth_hits": self.depth_hits,
+            "work_hits": self.work_hits,
+        }
+
+    def record(self, parser: SinglePassParser) -> None:
+        """Counts the limits a parse ran into."""
+        if parser.depth_limited or parser.work_limited:
+            with self._lock:
+                self.depth_hits += parser.depth_limited
+                self.work_hits += parser.work_limited
+
+
+def plain_paragraph(text: str) -> SpanContainer:
+    """Wraps a paragraph of text in a paragraph object without parsing it."""
+    text = text.strip()
+    spans: List[Renderable] = [TextSpan(text)] if text else []
+    return BodyParagraph(spans)
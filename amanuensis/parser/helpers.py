@@ -42,7 +42,7 @@ def filesafe_title(title: str) -> str:
     s = re.sub(r"~", "-", s)
 
     # Encode all other characters
-    s = urllib.parse.quote(s)
+    s = urllib.parse.quote(s, safe="")
 
     # Strip encoding %s
     s = re.sub(r"%", "", s)
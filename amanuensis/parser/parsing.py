@@ -4,7 +4,7 @@ Lexipython markdown.
 """
 
 import re
-from typing import Sequence
+from typing import Iterator, List, Sequence, TextIO, Union
 
 from .core import (
     TextSpan,
@@ -18,14 +18,19 @@ from .core import (
     Renderable,
     SpanContainer,
 )
+from .singlepass import PARAGRAPH_BREAK, SinglePassParser
 
 Spans = Sequence[Renderable]
 
 
-def parse_raw_markdown(text: str) -> ParsedArticle:
+def parse_raw_markdown(text: str, single_pass: bool = False) -> ParsedArticle:
     """
     Parses a body of Lexipython markdown into a Renderable tree.
+    If `single_pass` is set, the linear-time parser is used instead of
+    the recursive descent parser. Both produce the same tree.
     """
+    if single_pass:
+        return SinglePassParser(text).parse()
     # Parse each paragraph individually, as no formatting applies
     # across paragraphs
     paragraphs = re.split(r"\n\n+", text)
@@ -33,6 +38,50 @@ def parse_raw_markdown(text: str) -> ParsedArticle:
     return ParsedArticle(parse_results)
 
 
+def iter_paragraphs(
+    source: Union[str, TextIO], chunk_size: int = 65536
+) -> Iterator[SpanContainer]:
+    """
+    Parses a body of Lexipython markdown lazily, yielding each paragraph
+    as it is parsed. The source may be a string or a text stream, which is
+    read `chunk_size` characters at a time and only as far as needed to
+    find the end of the next paragraph. The paragraphs are the same as
+    those of the tree returned by `parse_raw_markdown`.
+    """
+    if isinstance(source, str):
+        yield from SinglePassParser(source).iter_paragraphs()
+        return
+    buffer = ""
+    search_from = 0
+    while chunk := source.read(chunk_size):
+        buffer += chunk
+        start = 0
+        pending = None
+        for match in PARAGRAPH_BREAK.finditer(buffer, search_from):
+            # A break at the end of the buffer may continue in the next chunk
+            if match.end() == len(buffer):
+                pending = match.start()
+                break
+            paragraph = buffer[start : match.start()]
+            yield SinglePassParser(paragraph).parse_paragraph(0, len(paragraph))
+            start = match.end()
+        if pending is None:
+            # A trailing newline may start a break in the next chunk
+            pending = len(buffer) - 1 if buffer.endswith("\n") else len(buffer)
+        buffer = buffer[start:]
+        search_from = max(pending - start, 0)
+    yield from SinglePassParser(buffer).iter_paragraphs()
+
+
+def scan_citations(text: str) -> List[str]:
+    """
+    Returns the normalized citation targets in a body of Lexipython
+    markdown, in document order. This gives the same targets as the
+    citations in the parsed tree, but without building the tree.
+    """
+    return SinglePassParser(text).scan_citations()
+
+
 def parse_paragraph(text: str) -> SpanContainer:
     """
     Parses a block of text into a paragraph object.
@@ -0,0 +1,275 @@
+"""
+Internal module encapsulating a single-pass parser for Lexipython
+markdown. This produces the same token tree as the recursive descent
+parser, but it tracks offsets into the source text instead of slicing
+it, and it locates each formatting mark with one forward scan.
+"""
+
+import re
+from typing import Iterator, List, Optional, Tuple
+
+from .helpers import normalize_title
+from .core import (
+    TextSpan,
+    LineBreak,
+    ParsedArticle,
+    BodyParagraph,
+    SignatureParagraph,
+    BoldSpan,
+    ItalicSpan,
+    CitationSpan,
+    Renderable,
+    SpanContainer,
+)
+
+
+PARAGRAPH_BREAK = re.compile(r"\n\n+")
+LINE_BREAK = "\\\\\n"
+
+CITE = 0
+BOLD = 1
+ITALIC = 2
+
+
+class MarkCursor:
+    """
+    Finds occurrences of a formatting mark in the source text. Queries
+    must be made at nondecreasing positions, which lets the cursor reuse
+    the last occurrence it found and scan each character at most once.
+    """
+
+    def __init__(self, text: str, mark: str):
+        self.text = text
+        self.mark = mark
+        self.pos = text.find(mark)
+
+    def find(self, start: int) -> int:
+        """Returns the first occurrence at or after `start`, or -1."""
+        if -1 < self.pos < start:
+            self.pos = self.text.find(self.mark, start)
+        return self.pos
+
+
+class SinglePassParser:
+    """
+    Parses a body of Lexipython markdown in time linear in its length.
+
+    The recursive descent parser searches for every mark type at every
+    level of recursion. This parser instead visits the paragraphs and
+    the segments within them in document order, which means every mark
+    lookup happens at or after the previous lookup for that mark.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        max_depth: Optional[int] = None,
+        max_work: Optional[int] = None,
+    ):
+        self.text = text
+        # Optional limits for parsing untrusted text. Marks nested past the
+        # depth limit are left as text, and past the work limit, the rest of
+        # the text is parsed as if it had no formatting marks.
+        self.max_depth = max_depth
+        self.max_work = max_work
+        self.work = 0
+        self.depth_limited = False
+        self.work_limited = False
+        # Open and close marks get separate cursors even when the mark is
+        # the same, since close lookups run ahead of the open lookups.
+        self.opens = (
+            MarkCursor(text, "[["),
+            MarkCursor(text, "**"),
+            MarkCursor(text, "//"),
+        )
+        self.closes = (
+            MarkCursor(text, "]]"),
+            MarkCursor(text, "**"),
+            MarkCursor(text, "//"),
+        )
+
+    def parse(self) -> ParsedArticle:
+        """Parses the text into a Renderable tree."""
+        return ParsedArticle(list(self.iter_paragraphs()))
+
+    def iter_paragraphs(self) -> Iterator[SpanContainer]:
+        """Parses the text one paragraph at a time, yielding each paragraph."""
+        for start, end in self.paragraph_bounds():
+            yield self.parse_paragraph(start, end)
+
+    def paragraph_bounds(self) -> Iterator[Tuple[int, int]]:
+        """Yields the start and end offsets of each paragraph in the text."""
+        start = 0
+        for match in PARAGRAPH_BREAK.finditer(self.text):
+            yield start, match.start()
+            start = match.end()
+        yield start, len(self.text)
+
+    def scan_citations(self) -> List[str]:
+        """
+        Returns the normalized targets of every citation in the text, in
+        document order, without building a token tree. Marks are matched
+        exactly as the parser matches them, so the result is the same as
+        collecting `cite_target` from the parsed tree.
+        """
+        targets: List[str] = []
+        for start, end in self.paragraph_bounds():
+            self.scan_spans(start, end, False, False, targets)
+        return targets
+
+    def scan_spans(
+        self,
+        start: int,
+        end: int,
+        in_bold: bool,
+        in_italic: bool,
+        targets: List[str],
+    ) -> None:
+        """
+        Collects citation targets between two offsets. Leading and trailing
+        whitespace and signature marks can't be part of a formatting mark,
+        so paragraphs don't need to be trimmed first.
+        """
+        text = self.text
+        while True:
+            # Stop as soon as there are no more citations in this segment
+            cite_open = self.opens[CITE].find(start)
+            if cite_open < 0 or cite_open + 2 > end:
+                return
+            found = self.find_pair(start, end, (False, in_bold, in_italic))
+            if found is None:
+                return
+            mark, mark_open, mark_close = found
+            if mark == CITE:
+                # Citations can't nest, so the inner text can be skipped
+                split = text.find("|", mark_open + 2, mark_close)
+                target_start = split + 1 if split > -1 else mark_open + 2
+                targets.append(normalize_title(text[target_start:mark_close]))
+            elif mark == BOLD:
+                self.scan_spans(mark_open + 2, mark_close, True, in_italic, targets)
+            else:
+                self.scan_spans(mark_open + 2, mark_close, in_bold, True, targets)
+            start = mark_close + 2
+            in_bold = in_italic = False
+
+    def parse_paragraph(self, start: int, end: int) -> SpanContainer:
+        """Parses the text between two offsets into a paragraph object."""
+        text = self.text
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end and text[start] == "~":
+            return SignatureParagraph(self.parse_spans(start + 1, end))
+        else:
+            return BodyParagraph(self.parse_spans(start, end))
+
+    def parse_spans(
+        self,
+        start: int,
+        end: int,
+        in_cite: bool = False,
+        in_bold: bool = False,
+        in_italic: bool = False,
+        depth: int = 0,
+    ) -> List[Renderable]:
+        """
+        Parses citations, bolds, and italics between two offsets. As in
+        the recursive parser, the text after a closed pair is parsed with
+        all three marks enabled again.
+        """
+        text = self.text
+        spans: List[Renderable] = []
+        while True:
+            if self.max_work is not None and not self.spend_work():
+                found = None
+            else:
+                found = self.find_pair(start, end, (in_cite, in_bold, in_italic))
+                if found and self.max_depth is not None and depth >= self.max_depth:
+                    self.depth_limited = True
+                    found = None
+            if found is None:
+                # Inside a pair, unformatted text does not parse breaks
+                if in_cite or in_bold or in_italic:
+                    if start < end:
+                        spans.append(TextSpan(text[start:end]))
+                else:
+                    self.parse_breaks(start, end, spans)
+                return spans
+            mark, mark_open, mark_close = found
+            self.parse_breaks(start, mark_open, spans)
+            inner_start = mark_open + 2
+            if mark == CITE:
+                # Split off a citation target if there is one
+                split = text.find("|", inner_start, mark_close)
+                if split > -1:
+                    inner_end, cite_target = split, text[split + 1 : mark_close]
+                else:
+                    inner_end, cite_target = mark_close, text[inner_start:mark_close]
+                inner = self.parse_spans(
+                    inner_start, inner_end, True, in_bold, in_italic, depth + 1
+                )
+                spans.append(CitationSpan(inner, cite_target))
+            elif mark == BOLD:
+                inner = self.parse_spans(
+                    inner_start, mark_close, in_cite, True, in_italic, depth + 1
+                )
+                spans.append(BoldSpan(inner))
+            else:
+                inner = self.parse_spans(
+                    inner_start, mark_close, in_cite, in_bold, True, depth + 1
+                )
+                spans.append(ItalicSpan(inner))
+            start = mark_close + 2
+            in_cite = in_bold = in_italic = False
+
+    def spend_work(self) -> bool:
+        """
+        Spends one unit of work on looking for a pair of marks, or records
+        that the work limit prevents it.
+        """
+        if self.max_work is None:
+            return True
+        if self.work >= self.max_work:
+            self.work_limited = True
+            return False
+        self.work += 1
+        return True
+
+    def find_pair(
+        self, start: int, end: int, excluded: Tuple[bool, bool, bool]
+    ) -> Optional[Tuple[int, int, int]]:
+        """
+        Finds the earliest pair of formatting marks between two offsets.
+        Only the first open mark of each type is considered, matching the
+        recursive parser. Returns the mark type and the positions of the
+        open and close marks, or None if there is no pair.
+        """
+        found = None
+        for mark in (CITE, BOLD, ITALIC):
+            if excluded[mark]:
+                continue
+            mark_open = self.opens[mark].find(start)
+            if mark_open < 0 or mark_open + 2 > end:
+                continue
+            if found is not None and mark_open > found[1]:
+                continue
+            mark_close = self.closes[mark].find(mark_open + 2)
+            if mark_close < 0 or mark_close + 2 > end:
+                continue
+            found = (mark, mark_open, mark_close)
+        return found
+
+    def parse_breaks(self, start: int, end: int, spans: List[Renderable]) -> None:
+        """Parses intra-paragraph line breaks between two offsets."""
+        if start >= end:
+            return
+        text = self.text
+        while True:
+            line_break = text.find(LINE_BREAK, start, end)
+            if line_break < 0:
+                spans.append(TextSpan(text[start:end]))
+                return
+            spans.append(TextSpan(text[start:line_break]))
+            spans.append(LineBreak())
+            start = line_break + len(LINE_BREAK)
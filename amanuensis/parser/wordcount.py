@@ -0,0 +1,61 @@
+"""
+Internal module encapsulating word counting for parsed Lexipython
+markdown.
+"""
+
+import re
+from typing import List
+
+from .core import (
+    BodyParagraph,
+    BoldSpan,
+    CitationSpan,
+    FoldingVisitor,
+    ItalicSpan,
+    LineBreak,
+    ParsedArticle,
+    SignatureParagraph,
+    TextSpan,
+)
+
+
+WORD = re.compile(r"\S+")
+
+
+def count_words(text: str) -> int:
+    """Returns the number of whitespace-separated words in some text."""
+    return len(WORD.findall(text))
+
+
+class WordCounter(FoldingVisitor):
+    """
+    Counts the words in each paragraph of a token tree. The text runs in a
+    paragraph are joined before counting, so a word that is split by
+    formatting marks, e.g. `**un**common`, counts as one word. Folding a
+    paragraph returns its word count, and folding an article returns the
+    list of its paragraphs' word counts.
+    """
+
+    def TextSpan(self, span: TextSpan) -> str:
+        return span.innertext
+
+    def LineBreak(self, span: LineBreak) -> str:
+        return "\n"
+
+    def ParsedArticle(self, span: ParsedArticle, children: List[int]) -> List[int]:
+        return children
+
+    def BodyParagraph(self, span: BodyParagraph, children: List[str]) -> int:
+        return count_words("".join(children))
+
+    def SignatureParagraph(self, span: SignatureParagraph, children: List[str]) -> int:
+        return count_words("".join(children))
+
+    def BoldSpan(self, span: BoldSpan, children: List[str]) -> str:
+        return "".join(children)
+
+    def ItalicSpan(self, span: ItalicSpan, children: List[str]) -> str:
+        return "".join(children)
+
+    def CitationSpan(self, span: CitationSpan, children: List[str]) -> str:
+        return "".join(children)
@@ -7,7 +7,7 @@ from flask import Flask, g, url_for, redirect
 from amanuensis.backend import *
 from amanuensis.config import AmanuensisConfig, CommandLineConfig
 from amanuensis.db import DbContext
-from amanuensis.parser import filesafe_title
+from amanuensis.parser import ParseGuard, RenderCache
 import amanuensis.server.auth as auth
 from amanuensis.server.helpers import UuidConverter, current_lexicon, current_membership
 import amanuensis.server.home as home
@@ -24,11 +24,11 @@ def date_format(dt: datetime, formatstr="%Y-%m-%d %H:%M:%S%z") -> str:
 
 
 def article_link(title):
-    """Get the url for a lexicon by its title"""
+    """Get the url for an article by its title"""
     return url_for(
         'lexicon.article',
         lexicon_name=g.lexicon.name,
-        title=filesafe_title(title))
+        title=title)
 
 
 def get_app(
@@ -53,7 +53,12 @@ def get_app(
 
     # Create the database context, if one wasn't already given
     if db is None:
-        db = DbContext(uri=app.config["DATABASE_URI"])
+        db = DbContext(
+            uri=app.config["DATABASE_URI"],
+            profile=app.config["DATABASE_PROFILE"],
+            pool_size=app.config["DATABASE_POOL_SIZE"],
+            pool_timeout=app.config["DATABASE_POOL_TIMEOUT"],
+        )
 
     # Make the database connection available to requests via g
     def db_setup():
@@ -61,6 +66,20 @@ def get_app(
 
     app.before_request(db_setup)
 
+    # Share one parse/render cache across requests, parsing user-submitted
+    # text under the configured limits
+    parse_guard = ParseGuard(
+        max_length=app.config["PARSE_MAX_LENGTH"],
+        max_depth=app.config["PARSE_MAX_DEPTH"],
+        max_work=app.config["PARSE_MAX_WORK"],
+    )
+    render_cache = RenderCache(app.config["RENDER_CACHE_SIZE"], guard=parse_guard)
+
+    def render_cache_setup():
+        g.render_cache = render_cache
+
+    app.before_request(render_cache_setup)
+
     # Tear down the session on request teardown
     def db_teardown(response_or_exc):
         db.session.remove()
@@ -77,6 +96,7 @@ def get_app(
             "charq": charq,
             "indq": indq,
             "postq": postq,
+            "render_cache": render_cache,
             "current_lexicon": current_lexicon,
             "current_membership": current_membership
         }
@@ -1,9 +1,21 @@
-from flask import Blueprint, flash, redirect, url_for, g, render_template, Markup
+from typing import Optional
+
+from flask import (
+    Blueprint,
+    abort,
+    flash,
+    redirect,
+    url_for,
+    g,
+    render_template,
+    Markup,
+)
 from flask_login import login_required, current_user
 
-from amanuensis.backend import lexiq, memq
-from amanuensis.db import DbContext, Lexicon, User
+from amanuensis.backend import artiq, indq, lexiq, memq
+from amanuensis.db import Article, DbContext, Lexicon, User
 from amanuensis.errors import ArgumentError
+from amanuensis.parser import normalize_title
 from amanuensis.server.helpers import lexicon_param, player_required_if_not_public
 
 from .characters import bp as characters_bp
@@ -61,21 +73,62 @@ def join(lexicon_name):
 @lexicon_param
 @player_required_if_not_public
 def contents(lexicon_name):
-    # indexed = sort_by_index_spec(info, g.lexicon.cfg.article.index.list)
-    # for articles in indexed.values():
-    #     for i in range(len(articles)):
-    #         articles[i] = {
-    #             'title': articles[i],
-    #             **info.get(articles[i])}
-    return render_template("lexicon.contents.jinja", lexicon_name=lexicon_name)
-
-
-@bp.get("/article/<title>")
+    db: DbContext = g.db
+    lexicon: Lexicon = g.lexicon
+    # Phantom titles are listed without a character
+    entries = [
+        {"title": article.title, "character": article.character}
+        for article in artiq.get_published(db, lexicon.id)
+    ] + [
+        {"title": title, "character": None}
+        for title in artiq.get_phantom_titles(db, lexicon.id)
+    ]
+    schema = indq.get_schema(db, lexicon.id)
+    indexed = {
+        index.name: bucket
+        for index, bucket in schema.bucket(
+            entries, key=lambda entry: entry["title"]
+        ).items()
+    }
+    return render_template(
+        "lexicon.contents.jinja", lexicon_name=lexicon_name, indexed=indexed
+    )
+
+
+@bp.get("/article/<path:title>")
 @lexicon_param
 @player_required_if_not_public
 def article(lexicon_name, title):
-    # article = {**a, 'html': Markup(a['html'])}
-    return render_template("lexicon.article.jinja", lexicon_name=lexicon_name)
+    db: DbContext = g.db
+    lexicon: Lexicon = g.lexicon
+    article: Optional[Article] = artiq.try_from_title(db, lexicon.id, title)
+    if not article:
+        # A title that is cited but not yet written has a phantom page
+        citers = [citer.title for citer in artiq.get_citers(db, lexicon.id, title)]
+        if not citers:
+            abort(404)
+        return render_template(
+            "lexicon.article.jinja",
+            lexicon_name=lexicon_name,
+            article={
+                "title": normalize_title(title),
+                "html": Markup("<p><i>This article has not been written yet.</i></p>"),
+                "cites": [],
+                "citedby": citers,
+            },
+        )
+    return render_template(
+        "lexicon.article.jinja",
+        lexicon_name=lexicon_name,
+        article={
+            "title": article.title,
+            "html": Markup(artiq.get_html(db, article)),
+            "cites": artiq.get_citations(db, article.id),
+            "citedby": [
+                citer.title for citer in artiq.get_citers(db, lexicon.id, article.title)
+            ],
+        },
+    )
 
 
 @bp.get("/rules/")
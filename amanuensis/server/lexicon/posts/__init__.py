@@ -1,11 +1,11 @@
-from flask import Blueprint, render_template, g
+from flask import Blueprint, render_template, g, request
 from flask.helpers import url_for
 from flask_login import current_user
 from werkzeug.utils import redirect
 
 from amanuensis.backend import postq
 from amanuensis.db import Post
-from amanuensis.parser import RenderableVisitor, parse_raw_markdown
+from amanuensis.parser import RenderCache, StreamingVisitor
 from amanuensis.parser.core import *
 from amanuensis.server.helpers import (
     lexicon_param,
@@ -20,7 +20,7 @@ from .forms import CreatePostForm
 bp = Blueprint("posts", __name__, url_prefix="/posts", template_folder=".")
 
 
-class PostFormatter(RenderableVisitor):
+class PostFormatter(StreamingVisitor):
     """Parses stylistic markdown into HTML without links."""
 
     def TextSpan(self, span: TextSpan):
@@ -30,32 +30,28 @@ class PostFormatter(RenderableVisitor):
         return "<br>"
 
     def ParsedArticle(self, span: ParsedArticle):
-        return "\n".join(span.recurse(self))
+        return ("", "\n", "")
 
     def BodyParagraph(self, span: BodyParagraph):
-        return f'<p>{"".join(span.recurse(self))}</p>'
+        return ("<p>", "", "</p>")
 
     def SignatureParagraph(self, span: SignatureParagraph):
-        return (
-            '<hr><span class="signature"><p>'
-            f'{"".join(span.recurse(self))}'
-            "</p></span>"
-        )
+        return ('<hr><span class="signature"><p>', "", "</p></span>")
 
     def BoldSpan(self, span: BoldSpan):
-        return f'<b>{"".join(span.recurse(self))}</b>'
+        return ("<b>", "", "</b>")
 
     def ItalicSpan(self, span: ItalicSpan):
-        return f'<i>{"".join(span.recurse(self))}</i>'
+        return ("<i>", "", "</i>")
 
     def CitationSpan(self, span: CitationSpan):
-        return "".join(span.recurse(self))
+        return ("", "", "")
 
 
 def render_post_body(post: Post) -> str:
     """Parse and render the body of a post into post-safe HTML."""
-    renderable: ParsedArticle = parse_raw_markdown(post.body)
-    rendered: str = renderable.render(PostFormatter())
+    render_cache: RenderCache = g.render_cache
+    rendered: str = render_cache.render(post.body, PostFormatter())
     return rendered
 
 
@@ -64,7 +60,9 @@ def render_post_body(post: Post) -> str:
 @player_required
 def list(lexicon_name):
     form = CreatePostForm()
-    new_posts, old_posts = postq.get_posts_for_membership(g.db, current_membership.id)
+    new_posts, old_posts, next_cursor = postq.get_posts_for_membership(
+        g.db, current_membership.id, before=request.args.get("before", type=int)
+    )
     return render_template(
         "posts.jinja",
         lexicon_name=lexicon_name,
@@ -72,6 +70,7 @@ def list(lexicon_name):
         render_post_body=render_post_body,
         new_posts=new_posts,
         old_posts=old_posts,
+        next_cursor=next_cursor,
     )
 
 
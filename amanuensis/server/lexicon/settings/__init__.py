@@ -132,7 +132,7 @@ def setup(lexicon_name):
 @editor_required
 def index(lexicon_name):
     # Get the current indices
-    indices: Sequence[ArticleIndex] = indq.get_for_lexicon(g.db, current_lexicon.id)
+    indices: Sequence[ArticleIndex] = indq.get_schema(g.db, current_lexicon.id).display
     index_data = [
         {
             "index_type": str(index.index_type),
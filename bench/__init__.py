@@ -0,0 +1,4 @@
+"""
+Benchmarks for Amanuensis. Run a benchmark module from the repository
+root, e.g. `python -m bench.visitors`.
+"""
@@ -0,0 +1,138 @@
+"""
+Deterministic generators for synthetic Lexipython markdown corpora. Each
+generator takes an approximate length in characters and a seed, and
+returns the same text for the same arguments.
+"""
+
+import random
+from typing import Callable, Dict, List
+
+
+WORDS = (
+    "the library of vellum was founded by scribes in third age and "
+    "catalogued every scroll tome folio under its archive lamp ink "
+    "quill scholar wrote a history on which all later accounts rest"
+).split()
+
+TITLES = [
+    "Ersatz Scrivener",
+    "Library of Vellum",
+    "Third Age",
+    "Scribe",
+    "Archive Lamp",
+    "Folio Tax",
+    "Quill Guild",
+    "Ink Wars",
+]
+
+
+def _sentence(rng: random.Random, length: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(length)]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+
+def _paragraphs(rng: random.Random, size: int, make: Callable[[], str]) -> str:
+    paragraphs: List[str] = []
+    total = 0
+    while total < size:
+        paragraph = make()
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def prose(size: int, seed: int = 0) -> str:
+    """Long paragraphs of plain text with occasional formatting."""
+    rng = random.Random(seed)
+
+    def make() -> str:
+        sentences = []
+        for _ in range(rng.randint(4, 10)):
+            sentence = _sentence(rng, rng.randint(6, 20))
+            roll = rng.random()
+            if roll < 0.1:
+                sentence = f"**{sentence}**"
+            elif roll < 0.2:
+                sentence = f"//{sentence}//"
+            sentences.append(sentence)
+        return " ".join(sentences)
+
+    return _paragraphs(rng, size, make)
+
+
+def glossary(size: int, seed: int = 0) -> str:
+    """Short entries dense with citations, some with display text."""
+    rng = random.Random(seed)
+
+    def make() -> str:
+        parts = [f"**{rng.choice(WORDS)}**:"]
+        for _ in range(rng.randint(3, 8)):
+            title = rng.choice(TITLES)
+            if rng.random() < 0.3:
+                parts.append(f"[[{rng.choice(WORDS)}|{title}]]")
+            else:
+                parts.append(f"[[{title}]]")
+            parts.append(rng.choice(WORDS))
+        return " ".join(parts)
+
+    return _paragraphs(rng, size, make)
+
+
+def nested(size: int, seed: int = 0) -> str:
+    """Paragraphs of bold, italic, and citation marks nested in each other."""
+    rng = random.Random(seed)
+    wrappers = [
+        lambda s: f"**{s}**",
+        lambda s: f"//{s}//",
+        lambda s: f"[[{s}|{rng.choice(TITLES)}]]",
+    ]
+
+    def make() -> str:
+        parts = []
+        for _ in range(rng.randint(10, 30)):
+            text = rng.choice(WORDS)
+            for wrap in rng.sample(wrappers, rng.randint(1, 3)):
+                text = wrap(text)
+            parts.append(text)
+        return " ".join(parts)
+
+    return _paragraphs(rng, size, make)
+
+
+def line_breaks(size: int, seed: int = 0) -> str:
+    """Verse-like paragraphs where nearly every line ends in a line break."""
+    rng = random.Random(seed)
+
+    def make() -> str:
+        lines = [_sentence(rng, rng.randint(3, 8)) for _ in range(rng.randint(4, 12))]
+        return "\\\\\n".join(lines)
+
+    return _paragraphs(rng, size, make)
+
+
+def unclosed(size: int, seed: int = 0) -> str:
+    """Paragraphs full of marks that are never closed."""
+    rng = random.Random(seed)
+    marks = ["**", "//", "[["]
+
+    def make() -> str:
+        parts = []
+        for _ in range(rng.randint(20, 60)):
+            parts.append(rng.choice(WORDS))
+            if rng.random() < 0.5:
+                parts.append(rng.choice(marks))
+        # Close a single citation at the end, so every earlier open mark
+        # is searched past before the pair is found
+        return " ".join(parts) + " ]]"
+
+    return _paragraphs(rng, size, make)
+
+
+CORPORA: Dict[str, Callable[[int, int], str]] = {
+    "prose": prose,
+    "glossary": glossary,
+    "nested": nested,
+    "line_breaks": line_breaks,
+    "unclosed": unclosed,
+}
@@ -0,0 +1,195 @@
+"""
+Benchmark for the database connection profiles. Runs a mix of post feed
+reads and post writes from several worker processes at once, as a server
+with several Flask workers would, and reports the throughput and the
+number of failed operations for each profile in SQLITE_PROFILES.
+"""
+
+from argparse import ArgumentParser
+import json
+from multiprocessing import Pool
+import os
+import platform
+import random
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from amanuensis.backend import lexiq, memq, postq, userq
+from amanuensis.db import DbContext, Post
+from amanuensis.db.database import SQLITE_PROFILES
+
+
+def setup_database(path: str, profile: str, posts: int) -> Tuple[int, int]:
+    """Creates a lexicon with a member and some posts, returning their ids."""
+    db = DbContext(path=path, profile=profile)
+    db.create_all()
+    lexicon = lexiq.create(db, "Bench", None, "A benchmark lexicon")
+    lexicon.joinable = True
+    user = userq.create(db, "bench", "password", None, "bench@example.com", False)
+    memq.create(db, user.id, lexicon.id, is_editor=False)
+    for i in range(posts):
+        db.session.add(Post(lexicon_id=lexicon.id, user_id=user.id, body=f"Post {i}"))
+    db.session.commit()
+    ids = (lexicon.id, user.id)
+    db.session.remove()
+    db.engine.dispose()
+    return ids
+
+
+def run_worker(
+    path: str,
+    profile: str,
+    lexicon_id: int,
+    user_id: int,
+    write_ratio: float,
+    start_at: float,
+    seconds: float,
+    seed: int,
+    pool_size: Optional[int],
+) -> Dict[str, Any]:
+    """Runs operations against the database until the deadline."""
+    db = DbContext(path=path, profile=profile, pool_size=pool_size)
+    rng = random.Random(seed)
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    latencies: List[float] = []
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = start_at + seconds
+    while time.time() < deadline:
+        began = time.perf_counter()
+        try:
+            if rng.random() < write_ratio:
+                postq.create(db, lexicon_id, user_id, "A benchmark post")
+                counts["writes"] += 1
+            else:
+                list(
+                    db(
+                        select(Post)
+                        .where(Post.lexicon_id == lexicon_id)
+                        .order_by(Post.created.desc())
+                        .limit(20)
+                    ).scalars()
+                )
+                counts["reads"] += 1
+        except OperationalError:
+            counts["errors"] += 1
+        finally:
+            db.session.remove()
+        latencies.append(time.perf_counter() - began)
+    db.engine.dispose()
+    return {**counts, "latencies": latencies}
+
+
+def bench_profile(
+    profile: str,
+    workers: int,
+    seconds: float,
+    write_ratio: float,
+    posts: int,
+    pool_size: Optional[int],
+) -> Dict[str, Any]:
+    """Runs the workers against a fresh database with one profile."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "bench.sqlite")
+        lexicon_id, user_id = setup_database(path, profile, posts)
+        start_at = time.time() + 1.0
+        with Pool(workers) as pool:
+            results = pool.starmap(
+                run_worker,
+                [
+                    (
+                        path,
+                        profile,
+                        lexicon_id,
+                        user_id,
+                        write_ratio,
+                        start_at,
+                        seconds,
+                        seed,
+                        pool_size,
+                    )
+                    for seed in range(workers)
+                ],
+            )
+    latencies = sorted(lat for result in results for lat in result["latencies"])
+    return {
+        "reads_per_second": sum(r["reads"] for r in results) / seconds,
+        "writes_per_second": sum(r["writes"] for r in results) / seconds,
+        "errors": sum(r["errors"] for r in results),
+        "p50_ms": latencies[len(latencies) // 2] * 1e3 if latencies else None,
+        "p99_ms": latencies[len(latencies) * 99 // 100] * 1e3 if latencies else None,
+    }
+
+
+def format_table(results: Dict[str, Any]) -> str:
+    """Formats results as a human-readable table."""
+    lines = [
+        f"{results['workers']} workers, {results['seconds']}s, "
+        f"{results['write_ratio']:.0%} writes, pool size {results['pool_size']}",
+        f"{'profile':>12} {'reads/s':>10} {'writes/s':>10} {'errors':>7}"
+        f" {'p50 ms':>8} {'p99 ms':>8}",
+    ]
+    for profile, result in results["profiles"].items():
+        lines.append(
+            f"{profile:>12} {result['reads_per_second']:10.1f}"
+            f" {result['writes_per_second']:10.1f} {result['errors']:7d}"
+            f" {result['p50_ms'] or 0:8.2f} {result['p99_ms'] or 0:8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Run length")
+    parser.add_argument(
+        "--write-ratio", type=float, default=0.2, help="Fraction of writes"
+    )
+    parser.add_argument("--posts", type=int, default=1000, help="Posts to seed")
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=None,
+        help="Connections pooled per worker (default: no pool)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="append",
+        choices=list(SQLITE_PROFILES),
+        help="Profile to run, may be repeated (default: all)",
+    )
+    parser.add_argument("--json", metavar="PATH", help="Write results as JSON")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workers": args.workers,
+        "seconds": args.seconds,
+        "write_ratio": args.write_ratio,
+        "posts": args.posts,
+        "pool_size": args.pool_size,
+        "profiles": {},
+    }
+    for profile in args.profile or SQLITE_PROFILES:
+        results["profiles"][profile] = bench_profile(
+            profile,
+            args.workers,
+            args.seconds,
+            args.write_ratio,
+            args.posts,
+            args.pool_size,
+        )
+
+    print(format_table(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark suite for the markdown parser and renderers. Measures parse
+time, render time for each visitor style, and peak memory on each of the
+synthetic corpora, and can write the results as JSON for comparing runs.
+"""
+
+from argparse import ArgumentParser
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, Optional
+
+from amanuensis.parser import parse_raw_markdown, scan_citations
+
+from .corpus import CORPORA
+from .visitors import FoldingHtml, RecursiveHtml, StreamingHtml
+
+
+def best_time(func: Callable[[], Any], number: int, repeat: int) -> Optional[float]:
+    """
+    Returns the best time per call in seconds, or None if the call fails,
+    e.g. when the recursive parser exceeds the recursion limit.
+    """
+    try:
+        func()
+    except RecursionError:
+        return None
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def peak_memory(func: Callable[[], Any]) -> Optional[int]:
+    """Returns the peak memory allocated by a call in bytes."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    except RecursionError:
+        peak = None
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def bench_corpus(text: str, number: int, repeat: int) -> Dict[str, Any]:
+    """Runs every measurement on one corpus."""
+    parsed = parse_raw_markdown(text, single_pass=True)
+    parsers = {
+        "recursive": lambda: parse_raw_markdown(text),
+        "single_pass": lambda: parse_raw_markdown(text, single_pass=True),
+        "scan_citations": lambda: scan_citations(text),
+    }
+    renderers = {
+        "recursive": lambda: parsed.render(RecursiveHtml()),
+        "folding": lambda: parsed.render(FoldingHtml()),
+        "streaming": lambda: parsed.render(StreamingHtml()),
+    }
+    return {
+        "chars": len(text),
+        "paragraphs": len(parsed.spans),
+        "parse_seconds": {
+            name: best_time(func, number, repeat) for name, func in parsers.items()
+        },
+        "parse_peak_bytes": {name: peak_memory(func) for name, func in parsers.items()},
+        "render_seconds": {
+            name: best_time(func, number, repeat) for name, func in renderers.items()
+        },
+        "render_peak_bytes": {
+            name: peak_memory(func) for name, func in renderers.items()
+        },
+    }
+
+
+def format_table(results: Dict[str, Any]) -> str:
+    """Formats results as a human-readable table."""
+    lines = []
+    for corpus, result in results["corpora"].items():
+        lines.append(
+            f"{corpus} ({result['chars']} chars, {result['paragraphs']} paragraphs)"
+        )
+        for stage in ("parse", "render"):
+            seconds = result[f"{stage}_seconds"]
+            peaks = result[f"{stage}_peak_bytes"]
+            for name in seconds:
+                time_str = (
+                    f"{seconds[name] * 1e3:10.3f} ms"
+                    if seconds[name] is not None
+                    else f"{'failed':>13}"
+                )
+                peak_str = (
+                    f"{peaks[name] / 1024:10.1f} KiB"
+                    if peaks[name] is not None
+                    else f"{'failed':>14}"
+                )
+                lines.append(f"  {stage:>6} {name:>15}: {time_str} {peak_str}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--size", type=int, default=20000, help="Approximate corpus length"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    parser.add_argument("--number", type=int, default=10, help="Calls per timing")
+    parser.add_argument("--repeat", type=int, default=5, help="Timings per case")
+    parser.add_argument(
+        "--corpus",
+        action="append",
+        choices=list(CORPORA),
+        help="Corpus to run, may be repeated (default: all)",
+    )
+    parser.add_argument("--json", metavar="PATH", help="Write results as JSON")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "recursion_limit": sys.getrecursionlimit(),
+        "size": args.size,
+        "seed": args.seed,
+        "number": args.number,
+        "repeat": args.repeat,
+        "corpora": {},
+    }
+    for name in args.corpus or CORPORA:
+        text = CORPORA[name](args.size, args.seed)
+        results["corpora"][name] = bench_corpus(text, args.number, args.repeat)
+
+    print(format_table(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Microbenchmark comparing visitor dispatch strategies for rendering a
+parsed article to HTML.
+"""
+
+from argparse import ArgumentParser
+import timeit
+
+from amanuensis.parser import (
+    FoldingVisitor,
+    RenderableVisitor,
+    StreamingVisitor,
+    parse_raw_markdown,
+)
+from amanuensis.parser.core import *
+
+
+class RecursiveHtml(RenderableVisitor):
+    """HTML renderer using the recursive visitor API."""
+
+    def TextSpan(self, span: TextSpan):
+        return span.innertext
+
+    def LineBreak(self, span: LineBreak):
+        return "<br>"
+
+    def ParsedArticle(self, span: ParsedArticle):
+        return "\n".join(span.recurse(self))
+
+    def BodyParagraph(self, span: BodyParagraph):
+        return f'<p>{"".join(span.recurse(self))}</p>'
+
+    def SignatureParagraph(self, span: SignatureParagraph):
+        return (
+            f'<hr><span class="signature"><p>{"".join(span.recurse(self))}</p></span>'
+        )
+
+    def BoldSpan(self, span: BoldSpan):
+        return f'<b>{"".join(span.recurse(self))}</b>'
+
+    def ItalicSpan(self, span: ItalicSpan):
+        return f'<i>{"".join(span.recurse(self))}</i>'
+
+    def CitationSpan(self, span: CitationSpan):
+        return f'<a>{"".join(span.recurse(self))}</a>'
+
+
+class FoldingHtml(FoldingVisitor):
+    """HTML renderer using the folding visitor API."""
+
+    def TextSpan(self, span: TextSpan):
+        return span.innertext
+
+    def LineBreak(self, span: LineBreak):
+        return "<br>"
+
+    def ParsedArticle(self, span: ParsedArticle, children):
+        return "\n".join(children)
+
+    def BodyParagraph(self, span: BodyParagraph, children):
+        return f'<p>{"".join(children)}</p>'
+
+    def SignatureParagraph(self, span: SignatureParagraph, children):
+        return f'<hr><span class="signature"><p>{"".join(children)}</p></span>'
+
+    def BoldSpan(self, span: BoldSpan, children):
+        return f'<b>{"".join(children)}</b>'
+
+    def ItalicSpan(self, span: ItalicSpan, children):
+        return f'<i>{"".join(children)}</i>'
+
+    def CitationSpan(self, span: CitationSpan, children):
+        return f'<a>{"".join(children)}</a>'
+
+
+class StreamingHtml(StreamingVisitor):
+    """HTML renderer using the streaming visitor API."""
+
+    def TextSpan(self, span: TextSpan):
+        return span.innertext
+
+    def LineBreak(self, span: LineBreak):
+        return "<br>"
+
+    def ParsedArticle(self, span: ParsedArticle):
+        return ("", "\n", "")
+
+    def BodyParagraph(self, span: BodyParagraph):
+        return ("<p>", "", "</p>")
+
+    def SignatureParagraph(self, span: SignatureParagraph):
+        return ('<hr><span class="signature"><p>', "", "</p></span>")
+
+    def BoldSpan(self, span: BoldSpan):
+        return ("<b>", "", "</b>")
+
+    def ItalicSpan(self, span: ItalicSpan):
+        return ("<i>", "", "</i>")
+
+    def CitationSpan(self, span: CitationSpan):
+        return ("<a>", "", "</a>")
+
+
+SAMPLE_PARAGRAPH = (
+    "The **Library of //Vellum//** was founded by [[Ersatz Scrivener]] "
+    "in the //third// age\\\\\nand catalogued by [[**the** Scribes|Scribe]]. "
+)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--paragraphs", type=int, default=50)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    text = "\n\n".join([SAMPLE_PARAGRAPH * 4] * args.paragraphs)
+    parsed = parse_raw_markdown(text, single_pass=True)
+
+    expected = parsed.render(RecursiveHtml())
+    assert parsed.render(FoldingHtml()) == expected
+    assert parsed.render(StreamingHtml()) == expected
+
+    cases = {
+        "recursive visitor": lambda: parsed.render(RecursiveHtml()),
+        "folding visitor": lambda: parsed.render(FoldingHtml()),
+        "streaming visitor": lambda: parsed.render(StreamingHtml()),
+    }
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=args.number, repeat=5))
+        print(f"{name:>20}: {best / args.number * 1e6:10.1f} us/render")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import pytest
 import time
 
+from sqlalchemy import update
+
 from amanuensis.backend import artiq
-from amanuensis.db import DbContext, Character, Lexicon, User
+from amanuensis.db import Article, ArticleState, DbContext, Character, Lexicon, User
 
 from amanuensis.errors import ArgumentError
 from tests.conftest import ObjectFactory
@@ -50,3 +52,123 @@ def test_article_update_ts(db: DbContext, make: ObjectFactory):
     article.title = "New title, who dis"
     db.session.commit()
     assert created != article.last_updated
+
+
+def test_citation_index(db: DbContext, make: ObjectFactory):
+    """Test that publishing maintains the citation table."""
+    user: User = make.user()
+    lexicon: Lexicon = make.lexicon()
+    make.membership(user_id=user.id, lexicon_id=lexicon.id)
+    char: Character = make.character(lexicon_id=lexicon.id, user_id=user.id)
+
+    alpha = make.article(
+        lexicon.id,
+        char.id,
+        "Alpha",
+        "Cites [[Beta]] and [[the gamma|Gamma]] and [[Beta]].",
+    )
+    beta = make.article(
+        lexicon.id, char.id, "Beta", "Cites [[Alpha]] and **[[Delta**]]."
+    )
+    gamma = make.article(lexicon.id, char.id, "Gamma", "Cites nothing.")
+
+    # Articles can't be published before the game starts
+    with pytest.raises(ArgumentError):
+        artiq.publish(db, alpha.id)
+    lexicon.current_turn = 1
+    db.session.commit()
+
+    # Articles can't be published before they are approved
+    draft = make.article(lexicon.id, char.id, "Draft", "Not yet approved.")
+    draft.state = ArticleState.DRAFT
+    db.session.commit()
+    with pytest.raises(ArgumentError):
+        artiq.publish(db, draft.id)
+
+    artiq.publish(db, alpha.id)
+    assert alpha.turn == 1
+    with pytest.raises(ArgumentError):
+        artiq.publish(db, alpha.id)
+    assert list(artiq.get_citations(db, alpha.id)) == ["Beta", "Gamma"]
+    assert list(artiq.get_citations(db, beta.id)) == []
+    assert list(artiq.get_phantom_titles(db, lexicon.id)) == ["Beta", "Gamma"]
+    assert list(artiq.get_orphans(db, lexicon.id)) == [alpha]
+
+    artiq.publish(db, beta.id)
+    assert [a.id for a in artiq.get_citers(db, lexicon.id, "beta ")] == [alpha.id]
+    assert [a.id for a in artiq.get_citers(db, lexicon.id, "Alpha")] == [beta.id]
+    assert list(artiq.get_citers(db, lexicon.id, "Delta")) == []
+    assert list(artiq.get_phantom_titles(db, lexicon.id)) == ["Gamma"]
+    assert list(artiq.get_orphans(db, lexicon.id)) == []
+
+    artiq.publish(db, gamma.id)
+    assert list(artiq.get_phantom_titles(db, lexicon.id)) == []
+
+    # A title can only be published once after normalization
+    for title in ("Gamma", " gamma ", "gamma"):
+        with pytest.raises(ArgumentError):
+            artiq.publish(
+                db, make.article(lexicon.id, char.id, title, "A second Gamma.").id
+            )
+    assert artiq.try_from_title(db, lexicon.id, "gamma") == gamma
+
+    # Published titles are normalized to match the citations to them
+    delta = make.article(lexicon.id, char.id, "  delta ", "Cites [[Alpha]].")
+    artiq.publish(db, delta.id)
+    assert delta.title == "Delta"
+    assert artiq.try_from_title(db, lexicon.id, "delta") == delta
+    assert [a.id for a in artiq.get_citers(db, lexicon.id, "Alpha")] == [
+        beta.id,
+        delta.id,
+    ]
+
+
+def test_rendered_html_cache(db: DbContext, make: ObjectFactory):
+    """Test that rendered HTML is reset when a cited title becomes extant."""
+    user: User = make.user()
+    lexicon: Lexicon = make.lexicon()
+    lexicon.current_turn = 1
+    make.membership(user_id=user.id, lexicon_id=lexicon.id)
+    char: Character = make.character(lexicon_id=lexicon.id, user_id=user.id)
+
+    alpha = make.article(lexicon.id, char.id, "Alpha", "Cites [[Beta]] <b>")
+    gamma = make.article(lexicon.id, char.id, "Gamma", "Cites [[Alpha]]")
+    beta = make.article(lexicon.id, char.id, " beta", "Cites nothing")
+
+    # Publishing renders the article against the current citation state
+    artiq.publish(db, alpha.id)
+    assert alpha.rendered_html == (
+        f'<p>Cites <a href="/lexicon/{lexicon.name}/article/Beta" class="phantom">'
+        "Beta</a> &lt;b&gt;</p>"
+    )
+    phantom_fingerprint = alpha.citation_fingerprint
+    assert artiq.try_from_title(db, lexicon.id, "alpha") == alpha
+    assert artiq.try_from_title(db, lexicon.id, "Beta") is None
+
+    # Publishing an article that doesn't affect Alpha's citations keeps its HTML
+    artiq.publish(db, gamma.id)
+    assert alpha.rendered_html is not None
+    assert 'class="phantom"' not in gamma.rendered_html
+
+    # Publishing a phantom title resets the HTML of the articles citing it
+    last_updated = alpha.last_updated
+    artiq.publish(db, beta.id)
+    assert alpha.rendered_html is None
+    assert artiq.try_from_title(db, lexicon.id, "Beta") == beta
+    assert list(artiq.get_phantom_titles(db, lexicon.id)) == []
+    html = artiq.get_html(db, alpha)
+    assert 'class="phantom"' not in html
+    assert alpha.rendered_html == html
+    assert alpha.citation_fingerprint != phantom_fingerprint
+    assert alpha.last_updated == last_updated
+
+    # Saved HTML rendered against an outdated citation state is not reused
+    db(
+        update(Article)
+        .where(Article.id == alpha.id)
+        .values(rendered_html="stale", citation_fingerprint=phantom_fingerprint)
+        .execution_options(synchronize_session="fetch")
+    )
+    db.session.commit()
+    assert artiq.get_html(db, alpha) == html
+    assert alpha.citation_fingerprint != phantom_fingerprint
@@ -86,3 +86,51 @@ def test_character_limits(db: DbContext, lexicon_with_editor):
     db.session.commit()
     char3 = charq.create(db, lexicon.id, user.id, "Test Character 3", signature=None)
     assert char3.id, "Failed to create character 3"
+
+
+def test_create_many_characters(db: DbContext, make):
+    """Test creating characters in bulk."""
+    lexicon: Lexicon = make.lexicon()
+    user1: User = make.user()
+    user2: User = make.user()
+    outsider: User = make.user()
+    make.membership(user_id=user1.id, lexicon_id=lexicon.id)
+    make.membership(user_id=user2.id, lexicon_id=lexicon.id)
+
+    # Character limits count the characters being created
+    with pytest.raises(ArgumentError):
+        charq.create_many(
+            db,
+            [
+                {"lexicon_id": lexicon.id, "user_id": user1.id, "name": "One"},
+                {"lexicon_id": lexicon.id, "user_id": user1.id, "name": "Two"},
+            ],
+        )
+    with pytest.raises(ArgumentError):
+        charq.create_many(
+            db, [{"lexicon_id": lexicon.id, "user_id": outsider.id, "name": "Out"}]
+        )
+    assert list(charq.get_in_lexicon(db, lexicon.id)) == []
+
+    chars = charq.create_many(
+        db,
+        [
+            {"lexicon_id": lexicon.id, "user_id": user1.id, "name": "One"},
+            {"lexicon_id": lexicon.id, "user_id": user2.id, "name": "Two"},
+        ],
+    )
+    assert [char.name for char in chars] == ["One", "Two"]
+    assert [char.signature for char in chars] == ["~One", "~Two"]
+    assert len({char.public_id for char in chars}) == 2
+
+    # A null limit allows any number of characters
+    lexicon.character_limit = None
+    db.session.commit()
+    chars = charq.create_many(
+        db,
+        [
+            {"lexicon_id": lexicon.id, "user_id": user1.id, "name": "Three"},
+            {"lexicon_id": lexicon.id, "user_id": user1.id, "name": "Four"},
+        ],
+    )
+    assert [char.name for char in chars] == ["Three", "Four"]
@@ -1,8 +1,8 @@
 from amanuensis.db.models import IndexType
 import pytest
 
-from amanuensis.backend import indq
-from amanuensis.db import DbContext, Lexicon
+from amanuensis.backend import indq, irq
+from amanuensis.db import ArticleIndex, DbContext, Lexicon
 
 from amanuensis.errors import ArgumentError
 
@@ -48,3 +48,169 @@ def test_create_index(db: DbContext, make):
         indq.create(**kwargs)
     kwargs = {**defaults, "index_type": IndexType.CHAR, "pattern": "&c."}
     assert indq.create(**kwargs)
+
+
+def test_index_schema(db: DbContext, make):
+    """Test that the compiled schema matches indices in logical order"""
+    lexicon: Lexicon = make.lexicon()
+
+    def create(index_type, pattern, logical_order, display_order):
+        return indq.create(
+            db, lexicon.id, index_type, pattern, logical_order, display_order, 0
+        )
+
+    def index_for(title):
+        index = schema.index_for(title)
+        return index.name if index else None
+
+    the = create(IndexType.PREFIX, "The ", 0, 5)
+    abc = create(IndexType.CHAR, "abc", 1, 0)
+    a_f = create(IndexType.RANGE, "A-F", 2, 1)
+    d_m = create(IndexType.RANGE, "D-M", 3, 2)
+    prefix_q = create(IndexType.PREFIX, "Qu", 1, 3)
+    etc = create(IndexType.ETC, "&c.", 4, 6)
+
+    schema = indq.get_schema(db, lexicon.id)
+    assert index_for("Apple") == abc.name
+    assert index_for("Elephant") == a_f.name
+    assert index_for("Kiwi") == d_m.name
+    assert index_for("The Moon") == the.name
+    assert index_for("Theory") == etc.name
+    assert index_for("Quince") == prefix_q.name
+    assert index_for("Zebra") == etc.name
+    assert index_for("") == etc.name
+
+    buckets = {
+        index.name: titles
+        for index, titles in schema.bucket(
+            ["Kiwi", "Banana", "The Moon", "Apple", "Fig"]
+        ).items()
+    }
+    assert buckets == {
+        abc.name: ["Apple", "Banana"],
+        a_f.name: ["Fig"],
+        d_m.name: ["Kiwi"],
+        prefix_q.name: [],
+        the.name: ["The Moon"],
+    }
+    assert list(buckets) == [abc.name, a_f.name, d_m.name, prefix_q.name, the.name]
+
+    # Without an ETC index, unmatched titles are left out
+    indq.update(db, lexicon.id, [the, abc, a_f, d_m, prefix_q])
+    schema = indq.get_schema(db, lexicon.id)
+    assert index_for("Zebra") is None
+    assert "Zebra" not in sum(schema.bucket(["Zebra"]).values(), [])
+
+
+def test_index_schema_cache(db: DbContext, make):
+    """Test that cached schemas are rebuilt when indices or rules change"""
+    lexicon: Lexicon = make.lexicon()
+    user = make.user()
+    make.membership(user_id=user.id, lexicon_id=lexicon.id)
+    char = make.character(lexicon_id=lexicon.id, user_id=user.id)
+    abc = make.index(lexicon_id=lexicon.id, index_type=IndexType.CHAR, pattern="ABC")
+
+    schema = indq.get_schema(db, lexicon.id)
+    assert indq.get_schema(db, lexicon.id) is schema
+    assert schema.permits(char.id, 1, "Zebra")
+
+    # Index rules are part of the schema
+    irq.create(db, lexicon.id, char.id, abc.id, 1)
+    schema = indq.get_schema(db, lexicon.id)
+    assert [index.name for index in schema.allowed_indices(char.id, 1)] == [abc.name]
+    assert schema.permits(char.id, 1, "Apple")
+    assert not schema.permits(char.id, 1, "Zebra")
+    assert schema.permits(char.id, 2, "Zebra")
+
+    # Updating the indices rebuilds the schema
+    etc = ArticleIndex(
+        lexicon_id=lexicon.id,
+        index_type=IndexType.ETC,
+        pattern="&c.",
+        logical_order=1,
+        display_order=1,
+        capacity=None,
+    )
+    indq.update(db, lexicon.id, [abc, etc])
+    assert indq.get_schema(db, lexicon.id) is not schema
+    schema = indq.get_schema(db, lexicon.id)
+    assert schema.index_for("Zebra").name == etc.name
+
+    # Cached schemas outlive the session that loaded them
+    db.session.remove()
+    assert indq.get_schema(db, lexicon.id) is schema
+    assert schema.index_for("Apple").name == "CHAR:ABC"
+
+
+def test_create_many_indices(db: DbContext, make):
+    """Test creating indices in bulk"""
+    lexicon: Lexicon = make.lexicon()
+    schema = indq.get_schema(db, lexicon.id)
+
+    with pytest.raises(ArgumentError):
+        indq.create_many(
+            db,
+            [
+                {
+                    "lexicon_id": lexicon.id,
+                    "index_type": IndexType.CHAR,
+                    "pattern": "A",
+                },
+                {
+                    "lexicon_id": lexicon.id,
+                    "index_type": IndexType.RANGE,
+                    "pattern": "Z-A",
+                },
+            ],
+        )
+    assert list(indq.get_for_lexicon(db, lexicon.id)) == []
+
+    indices = indq.create_many(
+        db,
+        [
+            {"lexicon_id": lexicon.id, "index_type": IndexType.CHAR, "pattern": "A"},
+            {"lexicon_id": lexicon.id, "index_type": IndexType.RANGE, "pattern": "B-F"},
+            {
+                "lexicon_id": lexicon.id,
+                "index_type": IndexType.ETC,
+                "pattern": "&c.",
+                "logical_order": 1,
+            },
+        ],
+    )
+    assert [index.name for index in indices] == ["CHAR:A", "RANGE:B-F", "ETC:&c."]
+    assert indq.get_schema(db, lexicon.id) is not schema
+    assert indq.get_schema(db, lexicon.id).index_for("Zebra").name == "ETC:&c."
+
+
+def test_update_indices(db: DbContext, make):
+    """Test that updating indices creates, updates, and deletes by pattern"""
+    lexicon: Lexicon = make.lexicon()
+    abc = make.index(lexicon_id=lexicon.id, index_type=IndexType.CHAR, pattern="ABC")
+    make.index(lexicon_id=lexicon.id, index_type=IndexType.CHAR, pattern="XYZ")
+
+    def index(index_type, pattern, order, capacity=None):
+        return ArticleIndex(
+            lexicon_id=lexicon.id,
+            index_type=index_type,
+            pattern=pattern,
+            logical_order=order,
+            display_order=order,
+            capacity=capacity,
+        )
+
+    indq.update(
+        db,
+        lexicon.id,
+        [
+            index(IndexType.CHAR, "ABC", 2, capacity=5),
+            index(IndexType.RANGE, "D-F", 1),
+            index(IndexType.ETC, "&c.", 3),
+        ],
+    )
+    indices = {index.name: index for index in indq.get_for_lexicon(db, lexicon.id)}
+    assert set(indices) == {"CHAR:ABC", "RANGE:D-F", "ETC:&c."}
+    assert indices["CHAR:ABC"].id == abc.id
+    assert indices["CHAR:ABC"].logical_order == 2
+    assert indices["CHAR:ABC"].capacity == 5
+    assert indq.get_schema(db, lexicon.id).index_for("Egg").name == "RANGE:D-F"
@@ -1,7 +1,8 @@
 import pytest
+from sqlalchemy import update
 
 from amanuensis.backend import postq
-from amanuensis.db import DbContext
+from amanuensis.db import DbContext, Membership
 
 from amanuensis.errors import ArgumentError, BackendArgumentTypeError
 
@@ -52,3 +53,106 @@ def test_create_post(db: DbContext, lexicon_with_editor):
     new_post = postq.create(**kwargs)
     assert new_post
     assert new_post.user_id is None
+
+
+def test_post_feed(db: DbContext, make):
+    """Test paging through a lexicon's post feed"""
+    user = make.user()
+    lexicon1 = make.lexicon()
+    lexicon2 = make.lexicon()
+    mem = make.membership(user_id=user.id, lexicon_id=lexicon1.id)
+    posts = [postq.create(db, lexicon1.id, user.id, f"Post {i}") for i in range(5)]
+    postq.create(db, lexicon2.id, user.id, "Elsewhere")
+
+    # Pages are newest first and scoped to the lexicon
+    page, cursor = postq.get_feed(db, lexicon1.id, page_size=2)
+    assert page == [posts[4], posts[3]]
+    page, cursor = postq.get_feed(db, lexicon1.id, before=cursor, page_size=2)
+    assert page == [posts[2], posts[1]]
+    page, cursor = postq.get_feed(db, lexicon1.id, before=cursor, page_size=2)
+    assert page == [posts[0]]
+    assert cursor is None
+
+    # The first page of a member's feed marks posts as seen
+    new, old, cursor = postq.get_posts_for_membership(db, mem.id, page_size=3)
+    assert new == posts[:1:-1]
+    assert old == []
+    assert postq.get_unread_count(db, mem.id) == 0
+    new, old, cursor = postq.get_posts_for_membership(db, mem.id, page_size=3)
+    assert new == []
+    assert old == posts[:1:-1]
+    new, old, cursor = postq.get_posts_for_membership(
+        db, mem.id, before=cursor, page_size=3
+    )
+    assert old == posts[1::-1]
+    assert cursor is None
+
+
+def test_unread_count(db: DbContext, make):
+    """Test the membership unread post counters"""
+    user1 = make.user()
+    user2 = make.user()
+    lexicon = make.lexicon()
+    other = make.lexicon()
+    mem1 = make.membership(user_id=user1.id, lexicon_id=lexicon.id)
+    mem2 = make.membership(user_id=user2.id, lexicon_id=lexicon.id)
+    postq.create(db, lexicon.id, user1.id, "One")
+    postq.create(db, lexicon.id, None, "Two")
+    postq.create(db, other.id, None, "Elsewhere")
+    assert postq.get_unread_count(db, mem1.id) == 2
+    assert postq.get_unread_count(db, mem2.id) == 2
+
+    # Viewing the feed resets the counter
+    postq.get_posts_for_membership(db, mem1.id)
+    assert postq.get_unread_count(db, mem1.id) == 0
+    assert postq.count_unread(db, mem1.id) == 0
+    assert postq.get_unread_count(db, mem2.id) == 2
+
+    # Counters that drift are corrected by reconciling
+    db(update(Membership).values(unread_post_count=7))
+    db.session.commit()
+    assert postq.reconcile_unread_counts(db, other.id) == 0
+    assert postq.reconcile_unread_counts(db) == 2
+    assert postq.get_unread_count(db, mem1.id) == 0
+    assert postq.get_unread_count(db, mem2.id) == 2
+    assert postq.reconcile_unread_counts(db) == 0
+
+    # Joining a lexicon with posts starts the counter at the unread posts
+    user3 = make.user()
+    mem3 = make.membership(user_id=user3.id, lexicon_id=lexicon.id)
+    assert postq.get_unread_count(db, mem3.id) == 2
+    assert postq.count_unread(db, mem3.id) == 2
+    assert postq.reconcile_unread_counts(db) == 0
+
+
+def test_create_many_posts(db: DbContext, make):
+    """Test creating posts in bulk"""
+    user = make.user()
+    lexicon = make.lexicon()
+    closed = make.lexicon()
+    closed.allow_post = False
+    db.session.commit()
+    mem = make.membership(user_id=user.id, lexicon_id=lexicon.id)
+
+    with pytest.raises(ArgumentError):
+        postq.create_many(
+            db,
+            [
+                {"lexicon_id": lexicon.id, "body": "Open"},
+                {"lexicon_id": closed.id, "body": "Closed"},
+            ],
+        )
+    with pytest.raises(ArgumentError):
+        postq.create_many(db, [{"lexicon_id": lexicon.id, "body": " "}])
+
+    count = postq.create_many(
+        db,
+        [
+            {"lexicon_id": lexicon.id, "user_id": user.id, "body": "One"},
+            {"lexicon_id": lexicon.id, "body": "Two"},
+        ],
+    )
+    assert count == 2
+    posts, _ = postq.get_feed(db, lexicon.id)
+    assert [post.body for post in posts] == ["Two", "One"]
+    assert postq.get_unread_count(db, mem.id) == 2
@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy import event
 
 from amanuensis.backend import irq
 from amanuensis.db import *
@@ -38,3 +39,95 @@ def test_create_assign(db: DbContext, make: ObjectFactory):
     with pytest.raises(ArgumentError):
         kwargs = {**defaults, "character_id": char2.id}
         irq.create(**kwargs)
+
+
+def test_create_many_assign(db: DbContext, make: ObjectFactory):
+    """Test creating index assignments in bulk"""
+    lexicon: Lexicon = make.lexicon()
+    lexicon2: Lexicon = make.lexicon()
+    user: User = make.user()
+    make.membership(lexicon_id=lexicon.id, user_id=user.id)
+    char: Character = make.character(lexicon_id=lexicon.id, user_id=user.id)
+    ind1: ArticleIndex = make.index(lexicon_id=lexicon.id)
+    ind2: ArticleIndex = make.index(lexicon_id=lexicon.id)
+    other: ArticleIndex = make.index(lexicon_id=lexicon2.id)
+
+    def rule(index_id, turn):
+        return {
+            "lexicon_id": lexicon.id,
+            "character_id": char.id,
+            "index_id": index_id,
+            "turn": turn,
+        }
+
+    with pytest.raises(ArgumentError):
+        irq.create_many(db, [rule(ind1.id, 1), rule(other.id, 2)])
+    with pytest.raises(ArgumentError):
+        irq.create_many(db, [rule(ind1.id, 1), rule(other.id + 100, 2)])
+    assert list(irq.get_for_lexicon(db, lexicon.id)) == []
+
+    rules = irq.create_many(db, [rule(ind1.id, 1), rule(ind2.id, 1), rule(ind1.id, 2)])
+    assert [(r.index_id, r.turn) for r in rules] == [
+        (ind1.id, 1),
+        (ind2.id, 1),
+        (ind1.id, 2),
+    ]
+
+
+def test_update_assign(db: DbContext, make: ObjectFactory):
+    """Test that updating index assignments only writes the difference"""
+    lexicon: Lexicon = make.lexicon()
+    user: User = make.user()
+    make.membership(lexicon_id=lexicon.id, user_id=user.id)
+    char: Character = make.character(lexicon_id=lexicon.id, user_id=user.id)
+    ind1: ArticleIndex = make.index(lexicon_id=lexicon.id)
+    ind2: ArticleIndex = make.index(lexicon_id=lexicon.id)
+
+    def rules(grid):
+        return [
+            ArticleIndexRule(
+                lexicon_id=lexicon.id,
+                character_id=char.id,
+                index_id=index_id,
+                turn=turn,
+            )
+            for index_id, turn in grid
+        ]
+
+    def rule_keys():
+        return {
+            (rule.index_id, rule.turn) for rule in irq.get_for_lexicon(db, lexicon.id)
+        }
+
+    statements = []
+
+    def count_statements(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    def save(grid):
+        # Build the input first so only the update's statements are counted.
+        # Each rule is given twice, since repeated rules are saved once.
+        new_rules = rules(grid) + rules(grid)
+        statements.clear()
+        event.listen(db.engine, "before_cursor_execute", count_statements)
+        try:
+            irq.update(db, lexicon.id, new_rules)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count_statements)
+        assert rule_keys() == grid
+        return len(statements)
+
+    # Saving a large grid change takes as many statements as a small one
+    save({(ind1.id, turn) for turn in range(1, 101)})
+    large = save(
+        {(ind1.id, turn) for turn in range(51, 101)}
+        | {(ind2.id, turn) for turn in range(1, 101)}
+    )
+    small = save(
+        {(ind1.id, turn) for turn in range(52, 101)}
+        | {(ind2.id, turn) for turn in range(1, 102)}
+    )
+    assert large == small
+
+    irq.update(db, lexicon.id, [])
+    assert rule_keys() == set()
@@ -74,3 +74,32 @@ def test_user_password(db: DbContext, make):
     userq.password_set(db, user.username, pw2)
     assert not userq.password_check(db, user.username, pw1)
     assert userq.password_check(db, user.username, pw2)
+
+
+def test_create_many_users(db: DbContext):
+    """Test creating users in bulk."""
+    userq.create(db, "existing", "password", None, "user@example.com", False)
+    defaults = {"password": "password", "email": "user@example.com"}
+
+    # Every user is verified before any are created
+    with pytest.raises(ArgumentError):
+        userq.create_many(
+            db, [{**defaults, "username": "new"}, {**defaults, "username": "me"}]
+        )
+    with pytest.raises(ArgumentError):
+        userq.create_many(db, [{**defaults, "username": "existing"}])
+    with pytest.raises(ArgumentError):
+        userq.create_many(db, [{**defaults, "username": "twin"}] * 2)
+    assert not userq.try_from_username(db, "new")
+
+    users = userq.create_many(
+        db,
+        [
+            {**defaults, "username": "first", "display_name": "First"},
+            {**defaults, "username": "second", "is_site_admin": True},
+        ],
+    )
+    assert [user.username for user in users] == ["first", "second"]
+    assert [user.display_name for user in users] == ["First", "second"]
+    assert users[1].is_site_admin
+    assert userq.password_check(db, "first", "password")
@@ -1,6 +1,7 @@
 """
 pytest test fixtures
 """
+
 import os
 import pytest
 import tempfile
@@ -135,6 +136,17 @@ class ObjectFactory:
         updated_kwargs = {**default_kwargs, **kwargs}
         return indq.create(self.db, **updated_kwargs)
 
+    def article(
+        self, lexicon_id: int, character_id: int, title: str, body: str
+    ) -> Article:
+        """Factory function for creating approved articles ready to publish."""
+        article = artiq.create(self.db, lexicon_id, character_id)
+        article.title = title
+        article.body = body
+        article.state = ArticleState.APPROVED
+        self.db.session.commit()
+        return article
+
     def client(self, user_id: int) -> UserClient:
         """Factory function for user test clients."""
         return UserClient(self.db, user_id)
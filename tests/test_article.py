@@ -0,0 +1,40 @@
+from flask import Flask, url_for
+
+from amanuensis.backend import artiq, memq
+from amanuensis.db import DbContext
+
+from tests.conftest import ObjectFactory
+
+
+def test_article_view(db: DbContext, app: Flask, make: ObjectFactory):
+    """Test the article and phantom article pages"""
+    with app.test_client() as client:
+        user = make.user()
+        make.client(user.id).login(client)
+        lexicon = make.lexicon()
+        lexicon.current_turn = 1
+        memq.create(db, user.id, lexicon.id, is_editor=True)
+        char = make.character(lexicon_id=lexicon.id, user_id=user.id)
+        article = make.article(lexicon.id, char.id, "Alpha", "Cites [[Beta]].")
+        artiq.publish(db, article.id)
+
+        def get(title):
+            return client.get(
+                url_for("lexicon.article", lexicon_name=lexicon.name, title=title)
+            )
+
+        # A published article shows its text and citations
+        response = get("Alpha")
+        assert response.status_code == 200
+        assert b"Cites" in response.data
+        assert b"Beta" in response.data
+
+        # A cited title that hasn't been written lists the articles citing it
+        response = get("beta")
+        assert response.status_code == 200
+        assert b"Beta" in response.data
+        assert b"not been written yet" in response.data
+        assert b"Alpha" in response.data
+
+        # A title no one has written or cited doesn't exist
+        assert get("Gamma").status_code == 404
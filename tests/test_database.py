@@ -0,0 +1,81 @@
+import os
+import tempfile
+from typing import Any, Callable, List
+
+import pytest
+from sqlalchemy import event, text
+
+from amanuensis.backend import artiq, charq, irq, memq, postq
+from amanuensis.db import DbContext
+
+from tests.conftest import ObjectFactory
+
+
+def test_database_profile():
+    """Test that profile pragmas are applied to new connections."""
+    with pytest.raises(ValueError):
+        DbContext(uri="sqlite:///:memory:", profile="nonexistent")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "db.sqlite")
+        db = DbContext(path=path, profile="performance", pool_size=2)
+        assert db(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert db(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert db(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert db(text("PRAGMA foreign_keys")).scalar() == 1
+        db.session.remove()
+        db.engine.dispose()
+
+        db = DbContext(path=path)
+        assert db(text("PRAGMA synchronous")).scalar() == 2  # FULL
+        db.session.remove()
+        db.engine.dispose()
+
+
+def query_plans(db: DbContext, func: Callable[[], Any]) -> List[List[str]]:
+    """Returns the query plan of each SELECT statement run by a function."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    return [
+        [
+            row[-1]
+            for row in db.session.connection().exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+        ]
+        for statement, parameters in statements
+    ]
+
+
+def test_hot_queries_use_indexes(db: DbContext, make: ObjectFactory):
+    """Test that frequent queries search indexes rather than scan tables."""
+    user = make.user()
+    lexicon = make.lexicon()
+    mem = make.membership(user_id=user.id, lexicon_id=lexicon.id)
+    make.character(lexicon_id=lexicon.id, user_id=user.id)
+    cursor = postq.create(db, lexicon.id, user.id, "Post").id
+
+    hot_queries = {
+        "membership": lambda: memq.try_from_ids(db, user.id, lexicon.id),
+        "unread count": lambda: postq.get_unread_count(db, mem.id),
+        "characters": lambda: list(charq.get_in_lexicon(db, lexicon.id)),
+        "published": lambda: list(artiq.get_published(db, lexicon.id)),
+        "index rules": lambda: list(irq.get_for_lexicon(db, lexicon.id)),
+        "post feed": lambda: postq.get_feed(db, lexicon.id, before=cursor),
+    }
+    for name, func in hot_queries.items():
+        plans = query_plans(db, func)
+        assert plans, name
+        for plan in plans:
+            for step in plan:
+                assert not step.startswith("SCAN"), f"{name}: {step}"
+                assert "TEMP B-TREE" not in step or name == "index rules", name
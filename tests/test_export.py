@@ -0,0 +1,83 @@
+import os
+
+from amanuensis.backend import artiq
+from amanuensis.db import DbContext, Lexicon, User
+from amanuensis.export import export_lexicon, page_name
+
+from tests.conftest import ObjectFactory
+
+
+def test_export_lexicon(db: DbContext, make: ObjectFactory, tmp_path):
+    """Test exporting a lexicon as a static site."""
+    user: User = make.user()
+    lexicon: Lexicon = make.lexicon()
+    lexicon.current_turn = 1
+    make.membership(user_id=user.id, lexicon_id=lexicon.id)
+    char = make.character(lexicon_id=lexicon.id, user_id=user.id)
+    for title, body in (
+        ("Alpha / Omega", "Cites [[Beta]] and [[Gamma]]"),
+        ("Beta", "Cites [[Alpha / Omega]]"),
+    ):
+        article = make.article(lexicon.id, char.id, title, body)
+        artiq.publish(db, article.id)
+
+    output = os.path.join(tmp_path, "site")
+    assert export_lexicon(db, lexicon, output) == 5
+    assert sorted(os.listdir(output)) == [
+        "article",
+        "assets",
+        "index.html",
+        "statistics.html",
+    ]
+    assert sorted(os.listdir(os.path.join(output, "article"))) == sorted(
+        page_name(title) for title in ("Alpha / Omega", "Beta", "Gamma")
+    )
+    with open(os.path.join(output, "article", page_name("Alpha / Omega"))) as f:
+        page = f.read()
+    assert f'<a href="{page_name("Beta")}">Beta</a>' in page
+    assert f'<a href="{page_name("Gamma")}" class="phantom">Gamma</a>' in page
+    for asset in os.listdir(os.path.join(output, "assets")):
+        assert f"../assets/{asset}" in page
+
+    # Exporting again replaces the previous build
+    first_build = os.path.realpath(output)
+    assert export_lexicon(db, lexicon, output) == 5
+    assert os.path.realpath(output) != first_build
+    assert not os.path.exists(first_build)
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ["site", os.path.basename(os.path.realpath(output))]
+    )
+
+    # A link pointed elsewhere is replaced without removing its target
+    elsewhere = os.path.join(tmp_path, "elsewhere")
+    os.makedirs(elsewhere)
+    os.remove(output)
+    os.symlink(elsewhere, output)
+    assert export_lexicon(db, lexicon, output) == 5
+    assert os.path.realpath(output) != os.path.realpath(elsewhere)
+    assert os.path.isdir(elsewhere)
+
+
+def test_export_colliding_titles(db: DbContext, make: ObjectFactory, tmp_path):
+    """Test that titles with the same file-safe form get separate pages."""
+    user: User = make.user()
+    lexicon: Lexicon = make.lexicon()
+    lexicon.current_turn = 1
+    make.membership(user_id=user.id, lexicon_id=lexicon.id)
+    char = make.character(lexicon_id=lexicon.id, user_id=user.id)
+    long_title = "A" * 70
+    for title, body in (
+        ("A/B", "Cites [[A2FB]]"),
+        (f"{long_title}Y", f"Cites [[{long_title}X]]"),
+    ):
+        article = make.article(lexicon.id, char.id, title, body)
+        artiq.publish(db, article.id)
+
+    output = os.path.join(tmp_path, "site")
+    assert export_lexicon(db, lexicon, output) == 6
+    pages = os.listdir(os.path.join(output, "article"))
+    assert len(pages) == 4
+    with open(os.path.join(output, "article", page_name(f"{long_title}Y"))) as f:
+        assert "This article has not been written yet" not in f.read()
+    with open(os.path.join(output, "article", page_name(f"{long_title}X"))) as f:
+        assert "This article has not been written yet" in f.read()
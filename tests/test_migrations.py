@@ -0,0 +1,63 @@
+from sqlalchemy import inspect, select
+
+from amanuensis.backend import artiq, postq
+from amanuensis.db import ArticleCitation, DbContext, Lexicon
+from amanuensis.db.migrations import backfill, get_pending, migrate, stamp
+
+from tests.conftest import ObjectFactory
+
+
+def test_migrate(db: DbContext, make: ObjectFactory):
+    """Test migrating a database created before the citation table."""
+    user = make.user()
+    lexicon = make.lexicon()
+    lexicon.current_turn = 1
+    mem_id = make.membership(user_id=user.id, lexicon_id=lexicon.id).id
+    char = make.character(lexicon_id=lexicon.id, user_id=user.id)
+    article = make.article(
+        lexicon.id, char.id, "Alpha", "Cites [[Beta]] and [[Gamma]]."
+    )
+    artiq.publish(db, article.id)
+    postq.create(db, lexicon.id, user.id, "First post")
+    postq.create(db, lexicon.id, user.id, "Second post")
+
+    # Roll the schema back to before the first migration
+    db.session.remove()
+    with db.engine.begin() as conn:
+        for ddl in (
+            "DROP TABLE citation",
+            "DROP INDEX ix_article_lexicon_id_title",
+            "DROP INDEX ix_post_lexicon_id_created",
+            "ALTER TABLE article DROP COLUMN rendered_html",
+            "ALTER TABLE article DROP COLUMN citation_fingerprint",
+            "ALTER TABLE lexicon DROP COLUMN index_version",
+            "ALTER TABLE membership DROP COLUMN unread_post_count",
+        ):
+            conn.exec_driver_sql(ddl)
+    assert [m.version for m in get_pending(db)] == [1, 2, 3, 4]
+
+    # Migrations can be applied up to a target version
+    assert [m.version for m in migrate(db, target=2)] == [1, 2]
+    assert [m.version for m in get_pending(db)] == [3, 4]
+    assert list(db(select(ArticleCitation.target).order_by("target")).scalars()) == [
+        "Beta",
+        "Gamma",
+    ]
+    assert db(select(Lexicon.index_version)).scalar_one() == 0
+
+    assert [m.version for m in migrate(db)] == [3, 4]
+    assert migrate(db) == []
+    index_names = {index["name"] for index in inspect(db.engine).get_indexes("post")}
+    assert "ix_post_lexicon_id_created" in index_names
+    assert postq.get_unread_count(db, mem_id) == 2
+
+
+def test_stamp_and_backfill(db: DbContext, make: ObjectFactory):
+    """Test marking a new database as migrated and batched backfills."""
+    stamp(db)
+    assert get_pending(db) == []
+
+    for _ in range(5):
+        make.lexicon(prompt="")
+    backfill(Lexicon.__table__, Lexicon.prompt == "", batch_size=2, prompt="Filled")(db)
+    assert set(db(select(Lexicon.prompt)).scalars()) == {"Filled"}
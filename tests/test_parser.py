@@ -1,3 +1,4 @@
+from io import StringIO
 from typing import Sequence
 
 from amanuensis.parser.core import (
@@ -12,14 +13,23 @@ from amanuensis.parser.core import (
     Renderable,
     SpanContainer,
     RenderableVisitor,
+    FoldingVisitor,
+    StreamingVisitor,
     Spans,
 )
+from amanuensis.parser import batch
+from amanuensis.parser.batch import parse_many, render_many
+from amanuensis.parser.cache import RenderCache
+from amanuensis.parser.guard import ParseGuard
 from amanuensis.parser.helpers import normalize_title, filesafe_title, titlesort
+from amanuensis.parser.wordcount import WordCounter, count_words
 from amanuensis.parser.parsing import (
     parse_breaks,
     parse_paired_formatting,
     parse_paragraph,
+    iter_paragraphs,
     parse_raw_markdown,
+    scan_citations,
 )
 
 
@@ -461,3 +471,470 @@ def test_visitor():
     assert len(visitor.visited) == len(type_order)
     for span, type in zip(visitor.visited, type_order):
         assert isinstance(span, type)
+
+
+def assert_same_tree(expected: Renderable, actual: Renderable, loc="root"):
+    """Asserts that two token trees have the same structure and text."""
+    assert type(expected) is type(actual), f"Unexpected span type at loc {loc}"
+    if isinstance(expected, TextSpan):
+        assert expected.innertext == actual.innertext, f"Unexpected text at {loc}"
+    if isinstance(expected, CitationSpan):
+        assert expected.cite_target == actual.cite_target, f"Unexpected cite at {loc}"
+    if isinstance(expected, SpanContainer):
+        assert len(expected.spans) == len(actual.spans), f"Unexpected size at {loc}"
+        for i, (exp, act) in enumerate(zip(expected.spans, actual.spans)):
+            assert_same_tree(exp, act, loc=f"{loc}.{i}")
+
+
+def test_single_pass_parity():
+    """Test that the single-pass parser matches the recursive parser"""
+    texts = [
+        "",
+        "\n\n",
+        "One\nTwo",
+        r"One\\" + "\n" + r"Two\\" + "\nThree",
+        r"One\\ " + "\nTwo",
+        "****",
+        "////",
+        "In the **beginning** was //the// Word",
+        r"**glory\\" + "\n**hammer**",
+        r"//glory\\" + "\n//hammer//",
+        "**Hello//world**//",
+        "**//hello//**",
+        "[[hello]]",
+        "[[hello||world]]",
+        "[[  hello  |  world  ]]",
+        "[[faith|hope|love]]",
+        "[[ [[|]] ]]",
+        "[[one|two\\\\\nthree]]",
+        "[[**hello|world**]]",
+        "**[[hello world**]]",
+        "[[**hello world]]**",
+        "**a\\\\\n//b// c\\\\\nd**",
+        "[[a //b// [[c|d]]",
+        "***a***b**",
+        "\tIn the beginning was the Word.",
+        "~Ersatz Scrivener, scholar extraordinaire",
+        (
+            "Writing a **unit test** requires having test //content//.\n\n"
+            "This content, of course, must be [[created|Writing test collateral]].\n\n"
+            "~Bucky\\\\\nUnit test writer"
+        ),
+    ]
+    for text in texts:
+        assert_same_tree(
+            parse_raw_markdown(text), parse_raw_markdown(text, single_pass=True)
+        )
+
+
+def test_render_cache():
+    """Test that the render cache reuses trees and evicts old entries"""
+
+    class CountingVisitor(RenderableVisitor):
+        def __init__(self):
+            self.count = 0
+
+        def TextSpan(self, span: TextSpan):
+            self.count += 1
+            return self
+
+    cache = RenderCache(capacity=3)
+
+    # Parsing the same body twice returns the same tree
+    tree = cache.parse("Hello **world**")
+    assert cache.parse("Hello **world**") is tree
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+    # Rendering reuses the cached tree and caches the result per version
+    result = cache.render("Hello **world**", CountingVisitor(), version=1)
+    assert result.count == 2
+    assert cache.render("Hello **world**", CountingVisitor(), version=1) is result
+    assert cache.render("Hello **world**", CountingVisitor(), version=2) is not result
+    assert len(cache) == 3
+
+    # Adding past capacity evicts the least recently used entry
+    cache.parse("Goodbye")
+    assert len(cache) == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.parse("Hello **world**") is tree
+
+
+def test_compact_tokens():
+    """Test that tokens are slotted and line breaks are shared"""
+    parsed: ParsedArticle = parse_raw_markdown(
+        "Some **bold** text\\\\\nand //italic// [[text|Cited]]\\\\\nhere\n\n~Sig"
+    )
+
+    def walk(span: Renderable):
+        assert not hasattr(span, "__dict__"), f"{type(span).__name__} has a dict"
+        for child in getattr(span, "spans", ()):
+            walk(child)
+
+    walk(parsed)
+    breaks = [span for span in parsed.spans[0].spans if isinstance(span, LineBreak)]
+    assert len(breaks) == 2
+    assert breaks[0] is breaks[1]
+    assert LineBreak() is breaks[0]
+
+
+class RecursiveFormatter(RenderableVisitor):
+    """Recursive visitor that renders a tree into a compact test format."""
+
+    def TextSpan(self, span: TextSpan):
+        return span.innertext
+
+    def LineBreak(self, span: LineBreak):
+        return "/"
+
+    def ParsedArticle(self, span: ParsedArticle):
+        return "|".join(span.recurse(self))
+
+    def BodyParagraph(self, span: BodyParagraph):
+        return f'p({"".join(span.recurse(self))})'
+
+    def SignatureParagraph(self, span: SignatureParagraph):
+        return f's({"".join(span.recurse(self))})'
+
+    def BoldSpan(self, span: BoldSpan):
+        return f'b({"".join(span.recurse(self))})'
+
+    def ItalicSpan(self, span: ItalicSpan):
+        return f'i({"".join(span.recurse(self))})'
+
+    def CitationSpan(self, span: CitationSpan):
+        return f'c({"".join(span.recurse(self))}:{span.cite_target})'
+
+
+def test_folding_visitor():
+    """Test that a folding visitor matches the equivalent recursive visitor"""
+
+    class FoldingFormatter(FoldingVisitor):
+        def __init__(self):
+            self.visited = []
+
+        def TextSpan(self, span: TextSpan):
+            self.visited.append(span)
+            return span.innertext
+
+        def LineBreak(self, span: LineBreak):
+            self.visited.append(span)
+            return "/"
+
+        def ParsedArticle(self, span: ParsedArticle, children):
+            self.visited.append(span)
+            return "|".join(children)
+
+        def BodyParagraph(self, span: BodyParagraph, children):
+            self.visited.append(span)
+            return f'p({"".join(children)})'
+
+        def SignatureParagraph(self, span: SignatureParagraph, children):
+            self.visited.append(span)
+            return f's({"".join(children)})'
+
+        def BoldSpan(self, span: BoldSpan, children):
+            self.visited.append(span)
+            return f'b({"".join(children)})'
+
+        def ItalicSpan(self, span: ItalicSpan, children):
+            self.visited.append(span)
+            return f'i({"".join(children)})'
+
+        def CitationSpan(self, span: CitationSpan, children):
+            self.visited.append(span)
+            return f'c({"".join(children)}:{span.cite_target})'
+
+    article: str = (
+        "Writing a **unit //test//** requires having test //content//.\n\n"
+        "This content must be [[**created**|Writing test collateral]].\n\n"
+        "~Bucky\\\\\nUnit test writer"
+    )
+    parsed: ParsedArticle = parse_raw_markdown(article)
+
+    # The folding visitor produces the same result as the recursive one
+    folder = FoldingFormatter()
+    assert parsed.render(folder) == parsed.render(RecursiveFormatter())
+
+    # Children are visited before their parents
+    type_order = [
+        TextSpan,
+        TextSpan,
+        TextSpan,
+        ItalicSpan,
+        BoldSpan,
+        TextSpan,
+        TextSpan,
+        ItalicSpan,
+        TextSpan,
+        BodyParagraph,
+        TextSpan,
+        TextSpan,
+        BoldSpan,
+        CitationSpan,
+        TextSpan,
+        BodyParagraph,
+        TextSpan,
+        LineBreak,
+        TextSpan,
+        SignatureParagraph,
+        ParsedArticle,
+    ]
+    assert len(folder.visited) == len(type_order)
+    for span, type in zip(folder.visited, type_order):
+        assert isinstance(span, type)
+
+    # Folding does not recurse, so very deep trees are safe to visit
+    deep: Renderable = TextSpan("deep")
+    for _ in range(10000):
+        deep = BoldSpan([deep])
+    assert (
+        ParsedArticle([deep]).render(FoldingFormatter()).endswith("deep" + ")" * 10000)
+    )
+
+
+def test_streaming_visitor():
+    """Test that a streaming visitor matches the equivalent recursive visitor"""
+
+    class StreamingFormatter(StreamingVisitor):
+        def TextSpan(self, span: TextSpan):
+            return span.innertext
+
+        def LineBreak(self, span: LineBreak):
+            return "/"
+
+        def ParsedArticle(self, span: ParsedArticle):
+            return ("", "|", "")
+
+        def BodyParagraph(self, span: BodyParagraph):
+            return ("p(", "", ")")
+
+        def SignatureParagraph(self, span: SignatureParagraph):
+            return ("s(", "", ")")
+
+        def BoldSpan(self, span: BoldSpan):
+            return ("b(", "", ")")
+
+        def ItalicSpan(self, span: ItalicSpan):
+            return ("i(", "", ")")
+
+        def CitationSpan(self, span: CitationSpan):
+            return ("c(", "", f":{span.cite_target})")
+
+    article: str = (
+        "Writing a **unit //test//** requires having test //content//.\n\n"
+        "****\n\n"
+        "This content must be [[**created**|Writing test collateral]].\n\n"
+        "~Bucky\\\\\nUnit test writer"
+    )
+    parsed: ParsedArticle = parse_raw_markdown(article)
+    expected = parsed.render(RecursiveFormatter())
+
+    # Rendering joins the streamed fragments
+    assert parsed.render(StreamingFormatter()) == expected
+
+    # Fragments can be written out to a stream as they are produced
+    out = StringIO()
+    StreamingFormatter().write(parsed, out)
+    assert out.getvalue() == expected
+    assert len(list(StreamingFormatter().stream(parsed))) > len(parsed.spans)
+
+
+def test_render_cache_incremental():
+    """Test that incremental parsing only parses changed paragraphs"""
+    cache = RenderCache()
+    article: str = (
+        "Writing a **unit test** requires having test //content//.\n\n"
+        "This content, of course, must be [[created|Writing test collateral]].\n\n"
+        "~Bucky\\\\\nUnit test writer"
+    )
+
+    # The incremental parse matches the full parse
+    parsed = cache.parse_incremental(article)
+    assert_same_tree(parse_raw_markdown(article), parsed)
+    assert cache.stats()["misses"] == 3
+
+    # Editing one paragraph only misses on that paragraph
+    edited = article.replace("created", "written")
+    reparsed = cache.parse_incremental(edited)
+    assert_same_tree(parse_raw_markdown(edited), reparsed)
+    assert cache.stats()["misses"] == 4
+    assert reparsed.spans[0] is parsed.spans[0]
+    assert reparsed.spans[1] is not parsed.spans[1]
+    assert reparsed.spans[2] is parsed.spans[2]
+
+
+def test_scan_citations():
+    """Test that the citation scanner matches the citations in the tree"""
+
+    class CitationCollector(FoldingVisitor):
+        def CitationSpan(self, span, children):
+            return [span.cite_target]
+
+        def collect(self, span, children):
+            return [target for child in children if child for target in child]
+
+        ParsedArticle = BodyParagraph = SignatureParagraph = collect
+        BoldSpan = ItalicSpan = collect
+
+    texts = [
+        "",
+        "No citations here",
+        "[[hello]]",
+        "[[hello||world]]",
+        "[[  hello  |  world  ]]",
+        "[[faith|hope|love]]",
+        "[[ [[|]] ]]",
+        "[[one|two\\\nthree]]",
+        "**[[hello world**]]",
+        "[[**hello world]]**",
+        "**//[[a]]// [[b|c]]** [[d]]",
+        "[[a //b// [[c|d]]",
+        "[[a\n\nb]] [[c]]",
+        "~[[Signed]]",
+        "[[Same]] and [[same]] again",
+    ]
+    for text in texts:
+        expected = CitationCollector().fold(parse_raw_markdown(text))
+        assert scan_citations(text) == expected, text
+    assert scan_citations("**[[Shadowed** title]]") == []
+    assert scan_citations("[[ The  Title | the target ]]") == ["The target"]
+
+
+def test_batch_parse_render(monkeypatch):
+    """Test that batch parsing and rendering match serial parsing"""
+    bodies = [
+        f"Article {i} cites [[Article {i + 1}]].\n\n**Bold** and //italic//"
+        for i in range(8)
+    ]
+    expected = [parse_raw_markdown(body) for body in bodies]
+    # Small batches are handled serially
+    for tree, parsed in zip(expected, parse_many(bodies)):
+        assert_same_tree(tree, parsed)
+    # The process pool is opt-in, however large the batch
+    with monkeypatch.context() as m:
+        m.delattr(batch, "ProcessPoolExecutor")
+        for tree, parsed in zip(expected, parse_many(bodies, serial_threshold=0)):
+            assert_same_tree(tree, parsed)
+    # Force the process pool
+    parsed = parse_many(bodies, max_workers=2, chunksize=3, serial_threshold=0)
+    assert len(parsed) == len(bodies)
+    for tree, parsed_tree in zip(expected, parsed):
+        assert_same_tree(tree, parsed_tree)
+    rendered = render_many(
+        bodies, RecursiveFormatter(), max_workers=2, serial_threshold=0
+    )
+    assert rendered == [tree.render(RecursiveFormatter()) for tree in expected]
+    assert render_many([], RecursiveFormatter()) == []
+
+
+def test_parse_guard():
+    """Test that guarded parsing degrades to plain text past its limits"""
+    text = "**a //b [[c]]//**\n\nd [[e]] **f**"
+
+    # Under the default limits, guarded parsing is the same as unguarded
+    # parsing, including three levels of marks
+    guard = ParseGuard()
+    assert_same_tree(parse_raw_markdown(text), guard.parse(text))
+    assert guard.stats()["depth_hits"] == 0
+    assert guard.stats()["work_hits"] == 0
+
+    # A depth limit of two leaves a third level of marks as text, and only
+    # counts a hit when it does
+    guard = ParseGuard(max_depth=2)
+    parsed = guard.parse(text)
+    assert parsed.render(RecursiveFormatter()) == "p(b(a i(b [[c]])))|p(d c(e:E) b(f))"
+    assert guard.depth_hits == 1
+    guard.parse("**a //b//** [[c|**d**]]")
+    assert guard.depth_hits == 1
+
+    # A depth limit the grammar never reaches has no effect
+    guard = ParseGuard(max_depth=3)
+    assert_same_tree(parse_raw_markdown(text), guard.parse(text))
+    assert guard.depth_hits == 0
+
+    # Marks nested past the depth limit are left as text
+    guard = ParseGuard(max_depth=1)
+    parsed = guard.parse(text)
+    assert parsed.render(RecursiveFormatter()) == "p(b(a //b [[c]]//))|p(d c(e:E) b(f))"
+    assert guard.depth_hits == 1
+
+    # Text after the work limit is left as text
+    guard = ParseGuard(max_depth=None, max_work=5)
+    parsed = guard.parse(text)
+    assert parsed.render(RecursiveFormatter()) == "p(b(a i(b c(c:C))))|p(d [[e]] **f**)"
+    assert guard.work_hits == 1
+
+    # Text past the length limit is not parsed at all
+    guard = ParseGuard(max_length=10)
+    parsed = guard.parse(text)
+    assert (
+        parsed.render(RecursiveFormatter()) == "p(**a //b [[c]]//**)|p(d [[e]] **f**)"
+    )
+    assert guard.length_hits == 1
+
+    # The render cache parses under its guard
+    guard = ParseGuard(max_depth=0)
+    cache = RenderCache(guard=guard)
+    assert cache.parse("**a**").render(RecursiveFormatter()) == "p(**a**)"
+    assert cache.parse_incremental("//b//").render(RecursiveFormatter()) == "p(//b//)"
+    assert guard.depth_hits == 2
+
+    # The work limit applies to a whole body parsed incrementally, and
+    # paragraphs cut short by it are not reused in other bodies
+    body = "**a**\n\n**b**\n\n**c**"
+    guard = ParseGuard(max_work=5)
+    cache = RenderCache(guard=guard)
+    parsed = cache.parse_incremental(body)
+    assert_same_tree(ParseGuard(max_work=5).parse(body), parsed)
+    assert parsed.render(RecursiveFormatter()) == "p(b(a))|p(b(b))|p(**c**)"
+    assert guard.work_hits == 1
+    parsed = cache.parse_incremental("**c**")
+    assert parsed.render(RecursiveFormatter()) == "p(b(c))"
+
+
+def test_iter_paragraphs():
+    """Test that lazy paragraph parsing matches whole-article parsing"""
+    texts = [
+        "",
+        "\n\nOne",
+        "One\n\n",
+        "One\n\n\n\nTwo\nstill two\n \nstill two",
+        "**One\n\nTwo** [[Three]]\\\\\nFour\n\n~Five",
+    ]
+    for text in texts:
+        expected = [
+            paragraph.render(RecursiveFormatter())
+            for paragraph in parse_raw_markdown(text).spans
+        ]
+        paragraphs = [p.render(RecursiveFormatter()) for p in iter_paragraphs(text)]
+        assert paragraphs == expected, text
+        # Paragraph breaks split across chunk boundaries are still found
+        for chunk_size in (1, 2, 3, 64):
+            paragraphs = [
+                p.render(RecursiveFormatter())
+                for p in iter_paragraphs(StringIO(text), chunk_size)
+            ]
+            assert paragraphs == expected, (text, chunk_size)
+
+    # Streams are only read as far as the paragraph being parsed
+    stream = StringIO("First\n\n" + "Second " * 1000)
+    paragraphs = iter_paragraphs(stream, chunk_size=16)
+    assert next(paragraphs).render(RecursiveFormatter()) == "p(First)"
+    assert stream.tell() < 32
+
+
+def test_word_count():
+    """Test counting words per paragraph"""
+    assert count_words("") == 0
+    assert count_words("   ") == 0
+    assert count_words(" In the  beginning\twas\nthe Word ") == 6
+
+    parsed = parse_raw_markdown(
+        "In the **beginning** was //the// Word.\n\n"
+        "A word **un**split by //marks//, and\\\\\na line break.\n\n"
+        "   \n\n"
+        "~[[Ersatz Scrivener|Scrivener]]"
+    )
+    assert parsed.render(WordCounter()) == [6, 9, 0, 2]
+    assert WordCounter().fold(parsed.spans[1]) == 9